@@ -0,0 +1,122 @@
+import numpy as np
+
+# Column layout of models/healthmate_10_disease_dataset.csv
+TRAINING_FEATURES = [
+    'Age', 'Gender', 'BMI', 'Sleep_hours', 'Physical_activity_mins',
+    'Water_intake_liters', 'Screen_time_hrs', 'Stress_level',
+    'Work_study_pressure', 'Junk_food_per_week', 'Fruit_veggies_per_day',
+    'Social_interaction_hrs', 'Family_history'
+]
+TARGETS = [
+    'Diagnosed_diabetes', 'Risk_anxiety', 'Risk_depression', 'Risk_obesity',
+    'Risk_asthma', 'Risk_migraine', 'Risk_tb', 'Risk_cancer',
+    'Risk_heart_disease', 'Risk_stress_burnout'
+]
+
+
+def _features(rng, n):
+    return {
+        'Age': rng.integers(18, 80, n),
+        'Gender': np.where(rng.integers(0, 2, n) == 1, 'Male', 'Female'),
+        'BMI': np.round(np.clip(rng.normal(25.5, 4.5, n), 15, 45), 1),
+        'Sleep_hours': np.round(rng.uniform(4, 9.5, n), 1),
+        'Physical_activity_mins': rng.integers(0, 150, n),
+        'Water_intake_liters': np.round(rng.uniform(0.5, 4, n) * 2) / 2,
+        'Screen_time_hrs': np.round(rng.uniform(1, 12, n), 1),
+        'Stress_level': rng.integers(1, 11, n),
+        'Work_study_pressure': rng.integers(1, 11, n),
+        'Junk_food_per_week': rng.integers(0, 10, n),
+        'Fruit_veggies_per_day': rng.integers(0, 6, n),
+        'Social_interaction_hrs': np.round(rng.uniform(0, 5, n), 1),
+        'Family_history': np.where(rng.random(n) < 0.3, 'Yes', 'No'),
+    }
+
+
+def training_frame(rows, seed=0):
+    # Training-set shaped rows; each target is a noisy logistic function of a
+    # few lifestyle columns, so the forests have real structure to learn
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    data = _features(rng, rows)
+    age = (data['Age'] - 45) / 15
+    bmi = (data['BMI'] - 25) / 5
+    sleep = (7 - data['Sleep_hours']) / 1.5
+    activity = (60 - data['Physical_activity_mins']) / 40
+    junk = (data['Junk_food_per_week'] - 4) / 3
+    stress = (data['Stress_level'] - 5) / 3
+    family = (data['Family_history'] == 'Yes').astype(float)
+    scores = {
+        'Diagnosed_diabetes': age + bmi + activity + family - 1.5,
+        'Risk_anxiety': stress + sleep - 1,
+        'Risk_depression': stress + sleep - data['Social_interaction_hrs'] / 2 - 0.5,
+        'Risk_obesity': 2 * bmi + junk + activity - 1,
+        'Risk_asthma': (data['Screen_time_hrs'] - 6) / 4 + family - 2,
+        'Risk_migraine': (data['Screen_time_hrs'] - 6) / 3 + sleep - 1.5,
+        'Risk_tb': -3 + family,
+        'Risk_cancer': age + family - 2.5,
+        'Risk_heart_disease': age + bmi + junk + family - 2,
+        'Risk_stress_burnout': stress + (data['Work_study_pressure'] - 5) / 3 - 1,
+    }
+    for target, score in scores.items():
+        probability = 1 / (1 + np.exp(-(score + rng.normal(0, 0.5, rows))))
+        data[target] = (rng.random(rows) < probability).astype(np.int64)
+    return pd.DataFrame(data, columns=TRAINING_FEATURES + TARGETS)
+
+
+def user_sessions(n, seed=0):
+    # Bot session dicts, answers shaped like data/user_data.csv
+    rng = np.random.default_rng(seed)
+    sessions = []
+    for _ in range(n):
+        height = float(rng.integers(150, 196))
+        weight = float(rng.integers(45, 121))
+        sessions.append({
+            'Name': 'user', 'Age': int(rng.integers(13, 80)), 'Gender': int(rng.integers(0, 2)),
+            'Height': height, 'Weight': weight, 'BMI': round(weight / (height / 100) ** 2, 2),
+            'Sleep_hours': float(rng.integers(4, 10)),
+            'Physical_activity_mins': float(rng.choice([0, 10, 20, 30, 45, 60, 90])),
+            'Water_intake_liters': float(rng.choice([0.5, 1, 1.5, 2, 2.5, 3])),
+            'Junk_food_per_week': int(rng.integers(0, 10)),
+            'Fruit_veggies_per_day': int(rng.integers(0, 6)),
+            'Family_history': int(rng.integers(0, 2)),
+            'Lifestyle': str(rng.choice(['no', 'smoking', 'alcohol', 'both'])),
+            'Lifestyle_freq': int(rng.integers(0, 8)),
+        })
+    return sessions
+
+
+def user_checkups(n, seed=0):
+    # The same answers as typed sessions (models/checkup.py), as the bot keeps them
+    from checkup import Checkup
+
+    checkups = []
+    for session in user_sessions(n, seed):
+        checkup = Checkup(session.pop('Name'))
+        for key, value in session.items():
+            checkup[key] = value
+        checkups.append(checkup)
+    return checkups
+
+
+def user_records(n, users, seed=0):
+    # Record-store rows for `users` distinct users in arrival order
+    from storage import RECORD_DTYPE
+
+    rng = np.random.default_rng(seed)
+    records = np.zeros(n, dtype=RECORD_DTYPE)
+    records['UserID'] = rng.integers(0, users, n) + 5_000_000_000
+    records['Timestamp'] = 1.7e9 + np.arange(n)
+    records['Name'] = b'user'
+    records['Gender'] = rng.integers(0, 2, n)
+    records['Age'] = rng.integers(13, 80, n)
+    records['Height_cm'] = rng.integers(150, 196, n)
+    records['Weight_kg'] = rng.integers(45, 121, n)
+    records['BMI'] = records['Weight_kg'] / (records['Height_cm'] / 100) ** 2
+    records['Sleep_hours'] = rng.integers(4, 10, n)
+    records['Activity_minutes'] = rng.choice([0, 10, 20, 30, 45, 60, 90], n)
+    records['Water_intake_liters'] = rng.choice([0.5, 1, 1.5, 2, 2.5, 3], n)
+    records['Junk_food_per_week'] = rng.integers(0, 10, n)
+    records['Fruit_veggies_per_day'] = rng.integers(0, 6, n)
+    records['Probabilities'] = rng.uniform(0, 100, (n, len(TARGETS)))
+    return records
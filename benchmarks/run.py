@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [os.path.join(ROOT, "models"), os.path.join(ROOT, "bot"), BENCH_DIR]
+from generators import TARGETS, training_frame, user_checkups, user_records, user_sessions
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_FILE = os.path.join(BENCH_DIR, "results.json")
+# A metric regresses when it is this much worse than the baseline...
+THRESHOLD = 0.25
+# ...and the absolute change is above the noise floor for its unit
+NOISE_FLOOR = {"_ms": 0.05, "_seconds": 0.01, "_mb": 2.0, "_per_s": 0.0}
+
+PROFILES = {
+    "full": {"train_rows": 3000, "load_runs": 3, "predict_requests": 2000, "append_records": 50000,
+             "lookup_sizes": [10_000, 100_000, 1_000_000], "lookups": 500, "conversations": 50},
+    "quick": {"train_rows": 800, "load_runs": 1, "predict_requests": 300, "append_records": 10000,
+              "lookup_sizes": [10_000, 100_000], "lookups": 200, "conversations": 10},
+}
+BENCHMARKS = ["training", "model_load", "predict", "storage_append", "dashboard_lookup", "bot"]
+
+
+def latency_summary(samples_ms, prefix=""):
+    samples = np.asarray(samples_ms)
+    return {f"{prefix}p50_ms": float(np.percentile(samples, 50)),
+            f"{prefix}p95_ms": float(np.percentile(samples, 95))}
+
+
+def bench_training(profile):
+    # Wall clock per target on a synthetic training set; also leaves the
+    # joblib files and the forest bundle in the working directory
+    import joblib
+    import model
+    from forest_bundle import BUNDLE_FILE, write_forest_bundle
+
+    training_frame(profile["train_rows"]).to_csv("train.csv", index=False)
+    started = time.perf_counter()
+    data_hash = model.file_hash("train.csv")
+    df = model.load_dataset("train.csv")
+    os.makedirs(model.CACHE_DIR, exist_ok=True)
+    x_path, y_path = model.share_matrices(df, data_hash, model.CACHE_DIR)
+    model._init_worker(x_path, y_path, {col: str(df[col].dtype) for col in model.features})
+
+    results = {}
+    trained = {}
+    for target in model.targets:
+        target_started = time.perf_counter()
+        _, _, model_path, _, _ = model.train_target(target, data_hash, model.CACHE_DIR, use_cache=False)
+        results[f"{target}_seconds"] = time.perf_counter() - target_started
+        trained[target] = joblib.load(model_path)
+    write_forest_bundle(trained, BUNDLE_FILE, model.features)
+    results["total_seconds"] = time.perf_counter() - started
+    return results
+
+
+LOAD_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {models!r})
+def rss_mb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS")) / 1024
+before = rss_mb()
+started = time.perf_counter()
+import predict
+loaded = time.perf_counter()
+predict.predict_health_risks({{}})
+done = time.perf_counter()
+print(json.dumps({{"load_seconds": loaded - started, "first_predict_ms": (done - loaded) * 1000,
+                  "rss_mb": rss_mb(), "rss_delta_mb": rss_mb() - before}}))
+"""
+
+
+def bench_model_load(profile):
+    # Fresh interpreters: the memory-mapped bundle vs the per-model pickles
+    script = LOAD_SCRIPT.format(models=os.path.join(ROOT, "models"))
+    os.makedirs("pickles_only", exist_ok=True)
+    for target in TARGETS:
+        link = os.path.join("pickles_only", f"{target}_rf_model.joblib")
+        if not os.path.exists(link):
+            os.symlink(os.path.abspath(f"{target}_rf_model.joblib"), link)
+
+    # Best of a few runs; a single cold start is dominated by OS noise
+    results = {}
+    for name, cwd in (("bundle", "."), ("pickle", "pickles_only")):
+        for _ in range(profile["load_runs"]):
+            output = subprocess.run([sys.executable, "-c", script], cwd=cwd, check=True,
+                                    capture_output=True, text=True).stdout
+            for key, value in json.loads(output.strip().splitlines()[-1]).items():
+                results[f"{name}_{key}"] = min(value, results.get(f"{name}_{key}", value))
+    return results
+
+
+def bench_predict(profile):
+    import predict
+
+    sessions = user_sessions(profile["predict_requests"], seed=1)
+    cache = predict.prediction_cache
+    predict.prediction_cache = None
+    predict.predict_health_risks(sessions[0])
+
+    def single(sessions=sessions):
+        samples = []
+        for session in sessions:
+            started = time.perf_counter()
+            predict.predict_health_risks(session)
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
+
+    results = latency_summary(single(), "single_")
+    # The bot's typed sessions are scored from their own feature row
+    results.update(latency_summary(single(user_checkups(profile["predict_requests"], seed=1)), "checkup_"))
+    for batch_size in (16, 64):
+        started = time.perf_counter()
+        for i in range(0, len(sessions), batch_size):
+            predict.predict_health_risks_batch(sessions[i:i + batch_size])
+        results[f"batch{batch_size}_per_row_ms"] = (time.perf_counter() - started) / len(sessions) * 1000
+
+    if cache is not None:
+        predict.prediction_cache = cache
+        single()  # fill the cache
+        results.update(latency_summary(single(), "cached_"))
+    return results
+
+
+def bench_storage_append(profile):
+    from storage import RecordWriter, make_record
+
+    sessions = user_sessions(1000, seed=2)
+    n = profile["append_records"]
+    writer = RecordWriter("append.rec")
+    started = time.perf_counter()
+    for i in range(n):
+        writer.append(make_record(5_000_000_000 + i % 5000, sessions[i % len(sessions)]))
+    writer.close()
+    seconds = time.perf_counter() - started
+    return {"records_per_s": n / seconds, "file_mb": os.path.getsize("append.rec") / 2 ** 20}
+
+
+def bench_dashboard_lookup(profile):
+    # The dashboard's per-user load (index lookup + frame) as the store grows
+    from storage import RecordWriter, read_user_records, rebuild_index, records_to_frame
+
+    results = {}
+    rng = np.random.default_rng(3)
+    for size in profile["lookup_sizes"]:
+        path = f"lookup_{size}.rec"
+        records = user_records(size, users=max(1, size // 4), seed=size)
+        writer = RecordWriter(path)
+        writer.append(records[0])
+        writer.close()
+        with open(path, "ab") as f:
+            f.write(records[1:].tobytes())
+        rebuild_index(path)
+
+        user_ids = rng.choice(records['UserID'], profile["lookups"])
+        samples = []
+        for user_id in user_ids:
+            started = time.perf_counter()
+            records_to_frame(read_user_records(int(user_id), path))
+            samples.append((time.perf_counter() - started) * 1000)
+        results.update(latency_summary(samples, f"{size}_"))
+    return results
+
+
+def bench_bot(profile):
+    # Full checkups through the real Application and ConversationHandler,
+    # with Telegram replaced by a local stub
+    import main as bot
+    from telegram_stub import StubRequest, run_checkup
+
+    async def run():
+        request = StubRequest()
+        app = bot.build_application(request)
+        await app.initialize()
+        await bot.on_startup(app)
+        await run_checkup(app, 1)  # warm-up: models load on the first checkup
+        samples = []
+        for user_id in range(2, profile["conversations"] + 2):
+            started = time.perf_counter()
+            await run_checkup(app, user_id)
+            samples.append((time.perf_counter() - started) * 1000)
+        await bot.on_shutdown(app)
+        await app.shutdown()
+        results = latency_summary(samples, "checkup_")
+        results["messages_sent"] = len(request.sent)
+        return results
+
+    return asyncio.run(run())
+
+
+def compare(results, baseline, threshold):
+    # Prints a table against the baseline; returns the regressed metric names
+    regressions = []
+    print(f"\n{'metric':<48}{'baseline':>12}{'current':>12}{'change':>9}")
+    for bench, values in results["results"].items():
+        for name, value in values.items():
+            base = baseline["results"].get(bench, {}).get(name)
+            if not isinstance(base, (int, float)) or not base:
+                continue
+            change = (value - base) / abs(base)
+            higher_is_better = name.endswith("_per_s")
+            worse = -change if higher_is_better else change
+            floor = next((f for suffix, f in NOISE_FLOOR.items() if name.endswith(suffix)), 0.0)
+            flag = ""
+            if worse > threshold and abs(value - base) > floor:
+                flag = "  ❌ regression"
+                regressions.append(f"{bench}.{name}")
+            print(f"{bench + '.' + name:<48}{base:>12.3f}{value:>12.3f}{change:>+8.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HealthMate benchmark suite (runs offline)")
+    parser.add_argument("--quick", action="store_true", help="smaller data sizes")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS,
+                        help="benchmarks to run (training always runs; it builds the models)")
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write these results as the new baseline")
+    args = parser.parse_args()
+
+    profile_name = "quick" if args.quick else "full"
+    profile = PROFILES[profile_name]
+    selected = ["training"] + [b for b in BENCHMARKS[1:] if not args.only or b in args.only]
+    functions = {name: globals()[f"bench_{name}"] for name in BENCHMARKS}
+
+    results = {
+        "meta": {
+            "profile": profile_name,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {},
+    }
+    output, baseline_path = os.path.abspath(args.output), os.path.abspath(args.baseline)
+    with tempfile.TemporaryDirectory(prefix="healthmate-bench-") as workdir:
+        os.chdir(workdir)  # the scripts read and write their files relative to the cwd
+        for name in selected:
+            started = time.perf_counter()
+            results["results"][name] = functions[name](profile)
+            print(f"✅ {name:<18}{time.perf_counter() - started:7.1f}s  {results['results'][name]}")
+        os.chdir(ROOT)
+    results["meta"]["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.update_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+        return
+    if not os.path.exists(baseline_path):
+        print("No baseline yet; run with --update-baseline to record one.")
+        return
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("profile") != profile_name:
+        print(f"Baseline was recorded with the {baseline['meta'].get('profile')} profile; not comparing.")
+        return
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n✅ No regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
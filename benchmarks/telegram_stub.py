@@ -0,0 +1,68 @@
+import itertools
+import json
+import time
+
+from telegram import Update
+from telegram.request import BaseRequest
+
+# Answers for one full checkup, in conversation order
+CHECKUP_ANSWERS = ['/start', 'roy', '30', 'Male', '175', '80', '7', '20', '1.5', '5', '2',
+                   'Yes', 'Smoking', '3']
+
+
+class StubRequest(BaseRequest):
+    # Answers Bot API calls locally, so a real Application (handlers,
+    # ConversationHandler, job queue) runs with no network. Sent messages are
+    # kept in `sent` as (chat_id, text).
+
+    def __init__(self):
+        self.sent = []
+        self._message_ids = itertools.count(1)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        endpoint = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        if endpoint == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "HealthMate", "username": "healthmate_bot"}
+        elif endpoint == "sendMessage":
+            chat_id = int(params["chat_id"])
+            self.sent.append((chat_id, params.get("text", "")))
+            result = {"message_id": next(self._message_ids), "date": int(time.time()),
+                      "chat": {"id": chat_id, "type": "private"}, "text": params.get("text", "")}
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode("utf-8")
+
+
+_update_ids = itertools.count(1)
+
+
+def update_payload(user_id, text):
+    # A Telegram-shaped update as it arrives over a webhook
+    message = {
+        "message_id": next(_update_ids),
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": message["message_id"], "message": message}
+
+
+def make_update(bot, user_id, text):
+    return Update.de_json(update_payload(user_id, text), bot)
+
+
+async def run_checkup(app, user_id, answers=CHECKUP_ANSWERS):
+    # One user's full conversation through the application's handlers
+    for text in answers:
+        await app.process_update(make_update(app.bot, user_id, text))
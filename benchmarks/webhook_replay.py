@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from run import PROFILES, bench_training
+from telegram_stub import CHECKUP_ANSWERS, StubRequest, update_payload
+
+
+async def replay(url, user_ids, concurrency):
+    # Every user's checkup POSTed in conversation order; users run concurrently
+    import httpx
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def checkup(client, user_id):
+        async with slots:
+            for text in CHECKUP_ANSWERS:
+                started = time.perf_counter()
+                response = await client.post(url, json=update_payload(user_id, text))
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        await asyncio.gather(*(checkup(client, user_id) for user_id in user_ids))
+    return latencies
+
+
+def run_deployment(workers, users, concurrency):
+    import webhook
+    from storage import read_records
+
+    record_path = f"replay_{workers}.rec"
+    bot = webhook.ShardedBot(workers, record_path=record_path, request_factory=StubRequest)
+    server = webhook.serve(bot, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}{webhook.WEBHOOK_PATH}"
+
+    def drained(expected):
+        while sum(bot.processed()) < expected:
+            time.sleep(0.005)
+
+    try:
+        # Warm-up: one checkup per worker, so every process has its models mapped
+        base = workers * 1_000_000
+        asyncio.run(replay(url, range(base, base + workers), workers))
+        drained(workers * len(CHECKUP_ANSWERS))
+
+        user_ids = range(base + workers, base + workers + users)
+        started = time.perf_counter()
+        latencies = asyncio.run(replay(url, user_ids, concurrency))
+        drained((workers + users) * len(CHECKUP_ANSWERS))
+        seconds = time.perf_counter() - started
+        summary = bot.summary()
+    finally:
+        server.shutdown()
+        server.server_close()
+        bot.close()
+    return {
+        "updates_per_s": users * len(CHECKUP_ANSWERS) / seconds,
+        "checkups_per_s": users / seconds,
+        "ack_p50_ms": float(np.percentile(latencies, 50)),
+        "routed": summary["routed"],
+        "records": len(read_records(record_path)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay checkups through the sharded webhook deployment")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="healthmate-webhook-") as workdir:
+        os.chdir(workdir)  # models, record store and session DB live in the cwd
+        started = time.perf_counter()
+        bench_training(PROFILES["quick"])
+        print(f"✅ trained models in {time.perf_counter() - started:.1f}s ({os.cpu_count()} CPUs)")
+
+        print(f"\n{'workers':>8}{'updates/s':>12}{'checkups/s':>12}{'speedup':>9}{'ack p50':>10}{'records':>9}  routed")
+        first = None
+        for workers in args.workers:
+            result = run_deployment(workers, args.users, args.concurrency)
+            first = first or result["updates_per_s"]
+            print(f"{workers:>8}{result['updates_per_s']:>12.0f}{result['checkups_per_s']:>12.1f}"
+                  f"{result['updates_per_s'] / first:>8.2f}x{result['ack_p50_ms']:>8.1f}ms"
+                  f"{result['records']:>9}  {result['routed']}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class InferenceScheduler:
+    # Collects predict requests from concurrent conversations into micro-batches
+    # and runs them off the event loop, so handlers never block polling.
+
+    def __init__(self, predict_batch, max_batch_size=32, max_wait_ms=10,
+                 max_workers=2, use_processes=False):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "batches": 0,
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "batch_size_total": 0,
+            "max_batch_size": 0,
+            "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0,
+        }
+        self._queue = None
+        self._task = None
+        self._executor = None
+        self._slots = None
+        self._inflight = set()
+        self._held = []  # requests _run has taken off the queue but not dispatched
+
+    async def start(self):
+        if self._task is not None:
+            return
+        pool = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        self._executor = pool(max_workers=self.max_workers)
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        # Requests the loop was holding when it was cancelled, and anything still
+        # queued, are scored before the executor goes away so no handler hangs
+        leftover, self._held = self._held, []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        for start in range(0, len(leftover), self.max_batch_size):
+            await self._slots.acquire()
+            await self._dispatch(leftover[start:start + self.max_batch_size])
+        self._executor.shutdown(wait=True)
+        self._task = None
+
+    async def submit(self, session):
+        if self._task is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        # Copy so later handler mutations don't race with the worker
+        self._queue.put_nowait((session.copy(), future, time.perf_counter()))
+        self.stats["submitted"] += 1
+        depth = self._queue.qsize()
+        self.stats["queue_depth"] = depth
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], depth)
+        return await future
+
+    def summary(self):
+        stats = dict(self.stats)
+        batches = stats["batches"] or 1
+        completed = stats["completed"] or 1
+        stats["avg_batch_size"] = stats["batch_size_total"] / batches
+        stats["avg_latency_ms"] = stats["latency_ms_total"] / completed
+        return stats
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = self._held  # visible to stop() if the loop is cancelled mid-collect
+        batch.append(await self._queue.get())
+        # Linger for company only while other batches are running; with the
+        # workers idle a lone request is scored right away
+        deadline = loop.time() + (self.max_wait if self._inflight else 0)
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        self.stats["queue_depth"] = self._queue.qsize()
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Keep collecting while up to max_workers batches are running
+            await self._slots.acquire()
+            self._held = []
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        sessions = [session for session, _, _ in batch]
+        self.stats["batches"] += 1
+        self.stats["batch_size_total"] += len(batch)
+        self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(batch))
+        try:
+            results = await loop.run_in_executor(self._executor, self.predict_batch, sessions)
+        except Exception as exc:
+            self.stats["failed"] += len(batch)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self._slots.release()
+
+        now = time.perf_counter()
+        for (_, future, submitted_at), result in zip(batch, results):
+            latency_ms = (now - submitted_at) * 1000
+            self.stats["completed"] += 1
+            self.stats["latency_ms_total"] += latency_ms
+            self.stats["latency_ms_max"] = max(self.stats["latency_ms_max"], latency_ms)
+            if not future.done():
+                future.set_result(result)
+
+
+if __name__ == "__main__":
+    # Quick burst simulation with a stub model: 500 conversations finishing at once
+    def stub_batch(sessions):
+        time.sleep(0.005)
+        return [{"Risk_stub": ("✅", float(s["Age"]))} for s in sessions]
+
+    async def simulate(n=500):
+        scheduler = InferenceScheduler(stub_batch, max_batch_size=64, max_wait_ms=5)
+        await scheduler.start()
+        results = await asyncio.gather(*(scheduler.submit({"Age": i}) for i in range(n)))
+        assert [r["Risk_stub"][1] for r in results] == list(range(n))
+        await scheduler.stop()
+        for key, value in scheduler.summary().items():
+            print(f"{key}: {value}")
+
+    asyncio.run(simulate())
@@ -1,3 +1,7 @@
+import time
+_import_started = time.perf_counter()
+import argparse
+import asyncio
 import logging
 from telegram import Update, ReplyKeyboardMarkup
 from telegram.ext import (
@@ -8,44 +12,73 @@ from telegram.ext import (
     ConversationHandler,
     ContextTypes,
 )
-from predict import predict_health_risks
-import pandas as pd
+import metrics
+from inference import InferenceScheduler
+from scoring_client import ScoringClient
+from storage import RECORD_FILE, RecordWriter, make_record
+from checkup import Checkup
+from sessions import SESSION_DB, SessionStore
+from reminders import ReminderWheel
+from updates import PerUserUpdateProcessor
+from rules import health_tips, reminder_mask, reminder_masks
 import os
-
-def save_user_data_csv(user_id, session_data):
-    data = {
-        "UserID": user_id,
-        "Name": session_data.get("Name", ""),
-        "Age": session_data.get("Age", ""),
-        "Gender": "Male" if session_data.get("Gender") == 1 else "Female",
-        "Height_cm": session_data.get("Height", ""),
-        "Weight_kg": session_data.get("Weight", ""),
-        "BMI": session_data.get("BMI", ""),
-        "Sleep_hours": session_data.get("Sleep_hours", ""),
-        "Activity_minutes": session_data.get("Physical_activity_mins", ""),
-        "Water_intake_liters": session_data.get("Water_intake_liters", ""),
-        "Junk_food_per_week": session_data.get("Junk_food_per_week", ""),
-        "Fruit_veggies_per_day": session_data.get("Fruit_veggies_per_day", ""),
-        "Family_history": session_data.get("Family_history", ""),
-        "Lifestyle": session_data.get("Lifestyle", ""),
-        "Lifestyle_freq": session_data.get("Lifestyle_freq", ""),
-    }
-
-    # Add prediction results if available
-    if "Predictions" in session_data:
-        for disease, prob in session_data["Predictions"].items():
-            data[f"{disease}"] = prob
-
-    df = pd.DataFrame([data])
-    csv_file = "user_health_data.csv"
-    if os.path.exists(csv_file):
-        df.to_csv(csv_file, mode='a', header=False, index=False)
+_import_seconds = time.perf_counter() - _import_started
+
+# Per-process state, created by build_application() (see init_state) so that
+# importing this module opens no files, threads or connections: a spawned
+# webhook worker imports it again as `__mp_main__`
+record_writer = None
+user_sessions = None
+inference = None
+scoring_client = None
+reminder_wheel = None
+
+# This process's share of users when it is one of several webhook workers
+# (see webhook.py); a single polling process owns everyone
+shard_index, shard_count = 0, 1
+
+def owns_user(user_id):
+    return user_id % shard_count == shard_index
+
+def save_user_record(user_id, session_data, timestamp=None):
+    # Returns the record's timestamp; saving again with it replaces the record
+    record = make_record(user_id, session_data, timestamp)
+    if timestamp is None:
+        record_writer.append(record)
     else:
-        df.to_csv(csv_file, index=False)
+        record_writer.update(record)
+    return float(record['Timestamp'])
 
 
 TOKEN = "Your own bot token"
 
+# Micro-batching for model inference (see inference.py)
+MAX_BATCH_SIZE = int(os.environ.get("HEALTHMATE_MAX_BATCH_SIZE", 32))
+MAX_WAIT_MS = float(os.environ.get("HEALTHMATE_MAX_WAIT_MS", 10))
+INFERENCE_WORKERS = int(os.environ.get("HEALTHMATE_INFERENCE_WORKERS", 2))
+# Updates handled at once across users; each user's stay in order (see updates.py)
+MAX_CONCURRENT_UPDATES = int(os.environ.get("HEALTHMATE_CONCURRENT_UPDATES", 256))
+# Score through a shared scoring server (models/scoring_server.py) instead of
+# loading the models in this process
+SCORING_URL = os.environ.get("HEALTHMATE_SCORING_URL")
+
+# In-progress conversations kept in memory (see sessions.py)
+MAX_ACTIVE_SESSIONS = int(os.environ.get("HEALTHMATE_MAX_ACTIVE_SESSIONS", 10000))
+SESSION_TTL_SECONDS = int(os.environ.get("HEALTHMATE_SESSION_TTL_SECONDS", 24 * 3600))
+REMINDER_INTERVAL = 7200
+# Reminder sends across all users (Telegram allows ~30 messages/second)
+REMINDER_RATE = float(os.environ.get("HEALTHMATE_REMINDER_RATE", 25))
+REMINDER_CONCURRENCY = int(os.environ.get("HEALTHMATE_REMINDER_CONCURRENCY", 8))
+# Local /metrics endpoint when HEALTHMATE_METRICS=1 (see models/metrics.py)
+METRICS_PORT = int(os.environ.get("HEALTHMATE_METRICS_PORT", 9100))
+# Reply from the distilled fast model and refine with the full forests in the
+# background; a follow-up is sent when a risk moves by REFINE_MIN_CHANGE points
+# or crosses the 20% warning line
+FAST_REPLY = os.environ.get("HEALTHMATE_FAST_REPLY", "1") == "1"
+REFINE_MIN_CHANGE = float(os.environ.get("HEALTHMATE_REFINE_MIN_CHANGE", 5))
+# Map the models in the background right after startup instead of on import
+WARM_UP_MODELS = os.environ.get("HEALTHMATE_WARM_UP_MODELS", "1") == "1"
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -55,42 +88,160 @@ logger = logging.getLogger(__name__)
     ASK_HISTORY, ASK_LIFESTYLE, ASK_LIFESTYLE_FREQ, SHOW_RESULTS
 ) = range(14)
 
-user_sessions = {}
+# Reply keyboards of the multiple-choice questions, shown again on a re-ask
+KEYBOARDS = {
+    'Gender': [['Male', 'Female']],
+    'Family_history': [['Yes', 'No']],
+    'Lifestyle': [['No', 'Smoking', 'Alcohol', 'Both']],
+}
+
+def predict_batch(sessions):
+    # Imported on first use so the bot starts before the models are loaded
+    from predict import predict_health_risks_batch
+    return predict_health_risks_batch(sessions)
+
+def warm_up_models():
+    started = time.perf_counter()
+    predict_batch([{}])
+    return time.perf_counter() - started
+
+def init_state(records=None):
+    # `records` replaces the record store writer (a webhook worker forwards
+    # records to the receiver process instead)
+    global record_writer, user_sessions, inference, scoring_client, reminder_wheel
+    # Flushed by the flush_records job on a worker thread, never on the event loop
+    record_writer = records if records is not None else RecordWriter(RECORD_FILE, autoflush=False)
+    user_sessions = SessionStore(SESSION_DB, max_active=MAX_ACTIVE_SESSIONS, ttl_seconds=SESSION_TTL_SECONDS)
+    inference = InferenceScheduler(
+        predict_batch,
+        max_batch_size=MAX_BATCH_SIZE,
+        max_wait_ms=MAX_WAIT_MS,
+        max_workers=INFERENCE_WORKERS,
+    )
+    scoring_client = ScoringClient(SCORING_URL) if SCORING_URL else None
+    reminder_wheel = ReminderWheel(
+        send=None,  # bound to the bot in on_startup
+        interval=REMINDER_INTERVAL,
+        rate=REMINDER_RATE,
+        concurrency=REMINDER_CONCURRENCY,
+        on_sent=user_sessions.reminders_sent,
+    )
+
+@metrics.timed("bot_scoring_seconds")
+async def score(session):
+    if scoring_client is not None:
+        return await scoring_client.predict(session.to_dict())
+    return await inference.submit(session)
+
+@metrics.timed("bot_fast_scoring_seconds")
+def fast_score(session):
+    # Distilled-model results for an instant reply (see models/fast_model.py),
+    # or None to wait for the forests. Blocks (model import and reload check),
+    # so the bot runs it on a worker thread.
+    if not FAST_REPLY or scoring_client is not None:
+        return None
+    import predict
+    if predict.fast_model is None:
+        return None
+    return predict.predict_health_risks(session, mode="fast")
+
+def set_predictions(session, results):
+    session["Predictions"] = {
+        disease: {"Label": risk, "Probability": prob}
+        for disease, (risk, prob) in results.items()
+    }
+
+def risk_lines(results):
+    lines = ""
+    for disease, (risk, prob) in results.items():
+        prob_percent = round(prob)
+        emoji = "⚠️" if prob_percent >= 20 else "✅"
+        lines += f"\n{emoji} {disease.replace('_', ' ').title()}: {prob_percent}% risk"
+    return lines
+
+refinements = set()  # refine_results tasks still running
+
+async def refine_results(update, user_id, session, fast_results, saved_at):
+    # The full forests behind a fast-model reply: their results are saved as a
+    # new revision of the record saved with the fast ones, and the user hears
+    # about any risk that moved noticeably
+    try:
+        results = await score(session)
+    except Exception:
+        logger.exception("Full scoring failed for user %s; keeping the fast results", user_id)
+        return
+    set_predictions(session, results)
+    save_user_record(user_id, session, saved_at)
+
+    changed = {}
+    for disease, (risk, prob) in results.items():
+        fast_prob = fast_results[disease][1]
+        if abs(prob - fast_prob) >= REFINE_MIN_CHANGE or (round(prob) >= 20) != (round(fast_prob) >= 20):
+            changed[disease] = (risk, prob)
+    if changed:
+        await update.message.reply_text("🔄 Updated after a closer look:" + risk_lines(changed))
 
+@metrics.timed("bot_handler_seconds", state="start")
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("👋 Hey! I’m HealthMate AI. Let’s take care of your wellness today. What’s your name?")
     return ASK_NAME
 
+async def answer(update, key, state):
+    # Stores the reply under `key` in the user's checkup -> (session, None), or
+    # (None, the state to go to): `state` again to re-ask after an invalid
+    # answer, END when the session expired or the bot restarted mid-checkup
+    session = user_sessions.get(update.effective_user.id)
+    if session is None:
+        await update.message.reply_text("⌛ Your checkup session expired. Type /start to begin again.")
+        return None, ConversationHandler.END
+    try:
+        session.answer(key, update.message.text)
+    except ValueError as e:
+        metrics.inc("bot_invalid_answers_total", question=key)
+        markup = ReplyKeyboardMarkup(KEYBOARDS[key], one_time_keyboard=True) if key in KEYBOARDS else None
+        await update.message.reply_text(f"🤔 {e}", reply_markup=markup)
+        return None, state
+    return session, None
+
+@metrics.timed("bot_handler_seconds", state="ask_age")
 async def ask_age(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    user_sessions[user_id] = {'Name': update.message.text}
+    user_sessions[user_id] = Checkup(update.message.text.strip())
     await update.message.reply_text(f"Nice to meet you, {update.message.text}! 🎉 How old are you?")
     return ASK_AGE
 
+@metrics.timed("bot_handler_seconds", state="ask_gender")
 async def ask_gender(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_sessions[update.effective_user.id]['Age'] = int(update.message.text)
-    reply_keyboard = [['Male', 'Female']]
+    session, retry = await answer(update, 'Age', ASK_AGE)
+    if retry is not None:
+        return retry
     await update.message.reply_text("Got it! What’s your gender?",
-        reply_markup=ReplyKeyboardMarkup(reply_keyboard, one_time_keyboard=True)
+        reply_markup=ReplyKeyboardMarkup(KEYBOARDS['Gender'], one_time_keyboard=True)
     )
     return ASK_GENDER
 
+@metrics.timed("bot_handler_seconds", state="ask_height")
 async def ask_height(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_sessions[update.effective_user.id]['Gender'] = 1 if update.message.text == 'Male' else 0
+    session, retry = await answer(update, 'Gender', ASK_GENDER)
+    if retry is not None:
+        return retry
     await update.message.reply_text("Can you tell me your height in centimeters? 📏")
     return ASK_HEIGHT
 
+@metrics.timed("bot_handler_seconds", state="ask_weight")
 async def ask_weight(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_sessions[update.effective_user.id]['Height'] = float(update.message.text)
+    session, retry = await answer(update, 'Height', ASK_HEIGHT)
+    if retry is not None:
+        return retry
     await update.message.reply_text("Thanks! And your weight in kilograms? ⚖️")
     return ASK_WEIGHT
 
+@metrics.timed("bot_handler_seconds", state="ask_sleep")
 async def ask_sleep(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    session = user_sessions[update.effective_user.id]
-    session['Weight'] = float(update.message.text)
-    height_m = session['Height'] / 100
-    bmi = round(session['Weight'] / (height_m ** 2), 2)
-    session['BMI'] = bmi
+    session, retry = await answer(update, 'Weight', ASK_WEIGHT)
+    if retry is not None:
+        return retry
+    bmi = session['BMI']  # set from height and weight
 
     # Send BMI info to user
     bmi_msg = f"📏 Your BMI is **{bmi}**.\n"
@@ -107,66 +258,89 @@ async def ask_sleep(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(f"How many hours of sleep do you get on average per night? 😴")
     return ASK_SLEEP
 
+@metrics.timed("bot_handler_seconds", state="ask_activity")
 async def ask_activity(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_sessions[update.effective_user.id]['Sleep_hours'] = float(update.message.text)
+    session, retry = await answer(update, 'Sleep_hours', ASK_SLEEP)
+    if retry is not None:
+        return retry
     await update.message.reply_text("Awesome! How many minutes do you usually move or exercise daily? 🏃‍♂️")
     return ASK_ACTIVITY
 
+@metrics.timed("bot_handler_seconds", state="ask_water")
 async def ask_water(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_sessions[update.effective_user.id]['Physical_activity_mins'] = float(update.message.text)
+    session, retry = await answer(update, 'Physical_activity_mins', ASK_ACTIVITY)
+    if retry is not None:
+        return retry
     await update.message.reply_text("How many liters of water do you drink every day? 💧")
     return ASK_WATER
 
+@metrics.timed("bot_handler_seconds", state="ask_junk")
 async def ask_junk(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_sessions[update.effective_user.id]['Water_intake_liters'] = float(update.message.text)
+    session, retry = await answer(update, 'Water_intake_liters', ASK_WATER)
+    if retry is not None:
+        return retry
     await update.message.reply_text("How many times a week do you eat junk food like chips, burgers, or soda? 🍔")
     return ASK_JUNK
 
+@metrics.timed("bot_handler_seconds", state="ask_fruit")
 async def ask_fruit(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_sessions[update.effective_user.id]['Junk_food_per_week'] = int(update.message.text)
+    session, retry = await answer(update, 'Junk_food_per_week', ASK_JUNK)
+    if retry is not None:
+        return retry
     await update.message.reply_text("How many servings of fruits and vegetables do you eat per day? 🥗")
     return ASK_FRUIT
 
+@metrics.timed("bot_handler_seconds", state="ask_history")
 async def ask_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_sessions[update.effective_user.id]['Fruit_veggies_per_day'] = int(update.message.text)
-    reply_keyboard = [['Yes', 'No']]
+    session, retry = await answer(update, 'Fruit_veggies_per_day', ASK_FRUIT)
+    if retry is not None:
+        return retry
     await update.message.reply_text("Do you have a family history of chronic diseases? 🧬",
-        reply_markup=ReplyKeyboardMarkup(reply_keyboard, one_time_keyboard=True)
+        reply_markup=ReplyKeyboardMarkup(KEYBOARDS['Family_history'], one_time_keyboard=True)
     )
     return ASK_HISTORY
 
+@metrics.timed("bot_handler_seconds", state="ask_lifestyle")
 async def ask_lifestyle(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_sessions[update.effective_user.id]['Family_history'] = 1 if update.message.text == 'Yes' else 0
-    reply_keyboard = [['No', 'Smoking', 'Alcohol', 'Both']]
+    session, retry = await answer(update, 'Family_history', ASK_HISTORY)
+    if retry is not None:
+        return retry
     await update.message.reply_text("Do you smoke or consume alcohol? 🚬🍷",
-        reply_markup=ReplyKeyboardMarkup(reply_keyboard, one_time_keyboard=True)
+        reply_markup=ReplyKeyboardMarkup(KEYBOARDS['Lifestyle'], one_time_keyboard=True)
     )
     return ASK_LIFESTYLE
 
+@metrics.timed("bot_handler_seconds", state="ask_lifestyle_freq")
 async def ask_lifestyle_freq(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_input = update.message.text
-    user_sessions[update.effective_user.id]['Lifestyle'] = user_input
-    if user_input == ('No','no'):
-        user_sessions[update.effective_user.id]['Lifestyle_freq'] = 0
+    session, retry = await answer(update, 'Lifestyle', ASK_LIFESTYLE)
+    if retry is not None:
+        return retry
+    if session['Lifestyle'] == 'no':
+        session['Lifestyle_freq'] = 0
         return await show_results(update, context)
     else:
         await update.message.reply_text("How many times a week do you smoke or drink? 🔁")
         return ASK_LIFESTYLE_FREQ
 
+@metrics.timed("bot_handler_seconds", state="show_results")
 async def show_results(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    session = user_sessions[user_id]
-    if 'Lifestyle_freq' not in session:
-        session['Lifestyle_freq'] = int(update.message.text)
-
-    results = predict_health_risks(session)
-    session["Predictions"] = {
-        disease: {"Label": risk, "Probability": prob}
-        for disease, (risk, prob) in results.items()
-    }
-
-    # 👇 Save to CSV
-    save_user_data_csv(user_id, session)
+    session = user_sessions.get(user_id)
+    if session is None or 'Lifestyle_freq' not in session:
+        session, retry = await answer(update, 'Lifestyle_freq', ASK_LIFESTYLE_FREQ)
+        if retry is not None:
+            return retry
+
+    fast_results = await asyncio.to_thread(fast_score, session)
+    results = fast_results if fast_results is not None else await score(session)
+    set_predictions(session, results)
+    # 👇 Save to the record store
+    saved_at = save_user_record(user_id, session)
+    if fast_results is not None:
+        # Reply now; the forests refine the results and replace the record
+        task = asyncio.create_task(refine_results(update, user_id, session.copy(), results, saved_at))
+        refinements.add(task)
+        task.add_done_callback(refinements.discard)
 
     dashboard_url = f"https://healthmateai.streamlit.app?user_id={user_id}"
 
@@ -181,73 +355,70 @@ async def show_results(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
     name = session.get("Name", "Friend")
-    result_text = f"📊 Here’s your health checkup summary, {name}:"
-    tips = []
-
-    for disease, (risk, prob) in results.items():
-        prob_percent = round(prob)
-        emoji = "⚠️" if prob_percent >= 20 else "✅"
-        result_text += f"\n{emoji} {disease.replace('_', ' ').title()}: {prob_percent}% risk"
-
-        if prob_percent >= 20:
-            if disease == "Risk_diabetes":
-                tips.append("🍬 Cut back on sugar and walk daily.")
-            elif disease == "Risk_anxiety":
-                tips.append("🧘 Try meditation and regular sleep.")
-            elif disease == "Risk_depression":
-                tips.append("📔 Journal your thoughts and talk to someone.")
-            elif disease == "Risk_obesity":
-                tips.append("🥗 Avoid junk food and move more.")
-            elif disease == "Risk_asthma":
-                tips.append("😷 Avoid allergens and dusty areas.")
-            elif disease == "Risk_migraine":
-                tips.append("💡 Reduce screen time and maintain sleep.")
-            elif disease == "Risk_tb":
-                tips.append("🏥 If coughing persists, get tested.")
-            elif disease == "Risk_cancer":
-                tips.append("🚭 Avoid smoking/alcohol, eat healthy.")
-            elif disease == "Risk_heart_disease":
-                tips.append("💓 Eat less salt and fat, stay active.")
-            elif disease == "Risk_stress_burnout":
-                tips.append("⏳ Take breaks and balance work and rest.")
+    result_text = f"📊 Here’s your health checkup summary, {name}:" + risk_lines(results)
 
     await update.message.reply_text(result_text)
+    tips = health_tips({disease: round(prob) for disease, (_, prob) in results.items()})
     if tips:
-        await update.message.reply_text("💡 Health Tips:" + "".join(set(tips)))
+        await update.message.reply_text("💡 Health Tips:" + "".join(tips))
     else:
         await update.message.reply_text("✅ You're doing great! Keep up the good habits!")
 
-    context.job_queue.run_repeating(reminder_callback, 7200, first=7200, chat_id=user_id, name=str(user_id))
+    # Profile and reminder schedule in one SQLite commit, off the event loop
+    await asyncio.to_thread(user_sessions.save_profile, user_id, session.to_dict(), REMINDER_INTERVAL)
+    user_sessions.complete(user_id)
+    reminder_wheel.add(user_id, reminder_mask(session), REMINDER_INTERVAL)
     await update.message.reply_text("⏰ I’ll remind you every 2 hours with wellness tips to keep you on track! 🌟")
     return ConversationHandler.END
 
-async def reminder_callback(context: ContextTypes.DEFAULT_TYPE):
-    user_id = int(context.job.name)
-    session = user_sessions.get(user_id)
-    if not session:
-        return
-
-    messages = []
-    if session['Water_intake_liters'] < 2:
-        messages.append("💧 Stay hydrated! Grab a glass of water.")
-    if session['Physical_activity_mins'] < 30:
-        messages.append("🏃‍♀️ Time for a quick stretch or walk.")
-    if session['Junk_food_per_week'] > 4:
-        messages.append("🍏 Choose something fresh and healthy today.")
-    if session['Sleep_hours'] < 6:
-        messages.append("🛌 Try to get more restful sleep tonight.")
-
-    if messages:
-        await context.bot.send_message(chat_id=user_id, text="📣 Friendly Health Reminder:" + "".join(messages))
-    else:
-        await context.bot.send_message(chat_id=user_id, text="🌟 Keep it up! You’re making awesome progress!")
-
+@metrics.timed("bot_handler_seconds", state="cancel")
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("No worries, your session was cancelled. Type /start to try again. 😊")
     return ConversationHandler.END
 
-def main():
-    app = ApplicationBuilder().token(TOKEN).build()
+async def flush_records(context: ContextTypes.DEFAULT_TYPE):
+    await asyncio.to_thread(record_writer.flush)
+
+async def warm_up():
+    seconds = await asyncio.to_thread(warm_up_models)
+    logger.info("Models warmed up in %.0f ms", seconds * 1000)
+
+async def on_startup(app):
+    if metrics.ENABLED:
+        metrics.serve(METRICS_PORT + shard_index)
+    await inference.start()
+    if WARM_UP_MODELS and scoring_client is None:
+        app.create_task(warm_up())
+    app.job_queue.run_repeating(flush_records, record_writer.flush_interval, name="flush_records")
+    # Rehydrate reminders persisted before the last restart
+    reminder_wheel.send = app.bot.send_message
+    scheduled = [entry for entry in user_sessions.reminders() if owns_user(entry[0])]
+    masks = reminder_masks([profile for *_, profile in scheduled])
+    for (user_id, _, delay, _), mask in zip(scheduled, masks):
+        reminder_wheel.add(user_id, int(mask), delay)
+    reminder_wheel.start()
+    logger.info("Rehydrated %d reminders", len(reminder_wheel))
+
+async def on_shutdown(app):
+    if refinements:
+        await asyncio.gather(*refinements, return_exceptions=True)
+    await inference.stop()
+    if scoring_client is not None:
+        await scoring_client.close()
+    await reminder_wheel.stop()
+    await asyncio.to_thread(record_writer.close)
+    user_sessions.close()
+    logger.info("Inference stats: %s", inference.summary())
+
+def build_application(request=None, records=None):
+    # `request` swaps the Telegram HTTP transport (e.g. the offline stub in
+    # benchmarks/telegram_stub.py); `records` is passed to init_state
+    init_state(records)
+    builder = (ApplicationBuilder().token(TOKEN).post_init(on_startup).post_shutdown(on_shutdown)
+               .concurrent_updates(PerUserUpdateProcessor(MAX_CONCURRENT_UPDATES)))
+    if request is not None:
+        builder = builder.request(request).get_updates_request(request)
+    app = builder.build()
 
     conv_handler = ConversationHandler(
         entry_points=[CommandHandler('start', start)],
@@ -270,6 +441,51 @@ def main():
     )
 
     app.add_handler(conv_handler)
+    return app
+
+def profile_startup():
+    # Cold-start breakdown; use `python -X importtime` for per-module detail
+    timings = [("bot module imports", _import_seconds)]
+
+    started = time.perf_counter()
+    build_application()
+    timings.append(("application build", time.perf_counter() - started))
+
+    started = time.perf_counter()
+    import predict
+    timings.append(("predict import + model load", time.perf_counter() - started))
+    timings.append(("  model artifact", "bundle (mmap)" if predict.bundle is not None else "joblib pickles"))
+
+    started = time.perf_counter()
+    predict_batch([{}])
+    timings.append(("first prediction", time.perf_counter() - started))
+
+    started = time.perf_counter()
+    predict_batch([{"Age": age} for age in range(32)])
+    timings.append(("warm batch of 32", time.perf_counter() - started))
+
+    print("⏱️ Startup profile")
+    for stage, value in timings:
+        value = f"{value * 1000:9.1f} ms" if isinstance(value, float) else f"{value:>12}"
+        print(f"{stage:<30}{value}")
+
+def main():
+    parser = argparse.ArgumentParser(description="HealthMate AI Telegram bot")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print an import/model-load latency breakdown and exit")
+    parser.add_argument("--webhook", action="store_true",
+                        help="receive updates over a webhook, sharded across worker processes")
+    parser.add_argument("--workers", type=int, help="webhook worker processes (default: CPU count)")
+    args = parser.parse_args()
+    if args.profile_startup:
+        profile_startup()
+        return
+    if args.webhook:
+        import webhook
+        webhook.run(args.workers or webhook.WORKERS)
+        return
+
+    app = build_application()
     print("🤖 HealthMate AI Bot is running...")
     app.run_polling()
 
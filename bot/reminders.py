@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import math
+import time
+from rules import reminder_mask, reminders
+
+logger = logging.getLogger(__name__)
+
+def _reminder_text(mask):
+    messages = reminders.decode(mask)
+    if messages:
+        return "📣 Friendly Health Reminder:" + "".join(messages)
+    return "🌟 Keep it up! You’re making awesome progress!"
+
+
+# A user's reminder is precomputed as a bitmask of REMINDER_RULES
+# (models/rules.py) over their answers, so the wheel stores one small int per
+# user and every message variant is built once here.
+REMINDER_TEXTS = [_reminder_text(mask) for mask in range(1 << len(reminders.rules))]
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=asyncio.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._updated = clock()
+
+    async def acquire(self):
+        while True:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await self.sleep((1 - self.tokens) / self.rate)
+
+
+class ReminderWheel:
+    # Hashed timer wheel whose span equals the reminder interval: every user
+    # sits in exactly one slot and is due once per rotation, so each tick fires
+    # a whole bucket instead of one scheduler job per user.
+
+    def __init__(self, send, interval=7200, slots=720, rate=25, burst=30,
+                 concurrency=8, on_sent=None, clock=time.monotonic, sleep=asyncio.sleep):
+        self.send = send
+        self.interval = interval
+        self.slots = slots
+        self.tick = interval / slots
+        self.concurrency = concurrency
+        self.on_sent = on_sent
+        self.clock = clock
+        self.sleep = sleep
+        self.limiter = TokenBucket(rate, burst, clock, sleep)
+        self.stats = {"scheduled": 0, "fired_buckets": 0, "sent": 0, "failed": 0}
+        self._buckets = [{} for _ in range(slots)]  # user_id -> reminder mask
+        self._slot_of = {}
+        self._epoch = clock()
+        self._fired_tick = 0  # tick k fires at epoch + k * tick
+        self._task = None
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def add(self, user_id, mask, delay=None):
+        delay = self.interval if delay is None else delay
+        self.remove(user_id)
+        due_tick = math.ceil((self.clock() - self._epoch + delay) / self.tick)
+        slot = max(due_tick, self._fired_tick + 1) % self.slots
+        self._buckets[slot][user_id] = mask
+        self._slot_of[user_id] = slot
+        self.stats["scheduled"] += 1
+
+    def remove(self, user_id):
+        slot = self._slot_of.pop(user_id, None)
+        if slot is not None:
+            self._buckets[slot].pop(user_id, None)
+
+    async def fire_due(self):
+        # Fire every slot whose tick has passed; returns the number of sends
+        current_tick = int((self.clock() - self._epoch) / self.tick)
+        sent = 0
+        while self._fired_tick < current_tick:
+            self._fired_tick += 1
+            sent += await self.fire_slot(self._fired_tick % self.slots)
+        return sent
+
+    async def fire_slot(self, slot):
+        bucket = list(self._buckets[slot].items())
+        if not bucket:
+            return 0
+        self.stats["fired_buckets"] += 1
+        pending = iter(bucket)
+        delivered = []
+
+        async def worker():
+            for user_id, mask in pending:
+                await self.limiter.acquire()
+                try:
+                    await self.send(chat_id=user_id, text=REMINDER_TEXTS[mask])
+                except Exception as exc:
+                    self.stats["failed"] += 1
+                    logger.warning("Reminder to %s failed: %s", user_id, exc)
+                else:
+                    self.stats["sent"] += 1
+                    delivered.append(user_id)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(bucket)))))
+        if self.on_sent and delivered:
+            await asyncio.to_thread(self.on_sent, delivered)  # a SQLite commit
+        return len(delivered)
+
+    async def run(self):
+        while True:
+            next_time = self._epoch + (self._fired_tick + 1) * self.tick
+            await self.sleep(max(0.0, next_time - self.clock()))
+            await self.fire_due()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+if __name__ == "__main__":
+    # Fake bot that records send times: 5k users due in the same tick
+    class FakeBot:
+        def __init__(self):
+            self.sent = []
+
+        async def send_message(self, chat_id, text):
+            self.sent.append((time.monotonic(), chat_id))
+            await asyncio.sleep(0.001)
+
+    async def simulate(users=5000, rate=2000):
+        bot = FakeBot()
+        wheel = ReminderWheel(bot.send_message, interval=7200, slots=720,
+                              rate=rate, burst=rate // 10, concurrency=16)
+        session = {'Water_intake_liters': 1, 'Physical_activity_mins': 10,
+                   'Junk_food_per_week': 2, 'Sleep_hours': 7}
+        for user_id in range(users):
+            wheel.add(user_id, reminder_mask(session), delay=0)
+        wheel._epoch -= wheel.tick  # pretend the first tick has passed
+        start = time.monotonic()
+        await wheel.fire_due()
+        elapsed = time.monotonic() - start
+        times = [t for t, _ in bot.sent]
+        per_second = max(sum(1 for t in times if s <= t < s + 1) for s in times[::500])
+        print(f"sent {len(bot.sent)} reminders in {elapsed:.2f}s")
+        print(f"peak sends in any 1s window: {per_second} (limit {rate}/s + burst)")
+        print(f"stats: {wheel.stats}")
+
+    asyncio.run(simulate())
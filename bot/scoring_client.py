@@ -0,0 +1,126 @@
+import httpx
+
+
+class ScoringClient:
+    # Async client for models/scoring_server.py. One pooled keep-alive client is
+    # shared by every conversation, so a checkup costs a request, not a connect.
+
+    def __init__(self, base_url, max_connections=32, timeout=10.0):
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+
+    async def predict(self, session):
+        # Same shape as predict_health_risks: {disease: (label, risk %)}
+        response = await self._client.post("/predict", json=session)
+        response.raise_for_status()
+        return {disease: tuple(value) for disease, value in response.json().items()}
+
+    async def predict_batch(self, sessions):
+        response = await self._client.post("/predict", json=list(sessions))
+        response.raise_for_status()
+        return [{disease: tuple(value) for disease, value in result.items()}
+                for result in response.json()]
+
+    async def health(self):
+        response = await self._client.get("/health")
+        response.raise_for_status()
+        return response.json()
+
+    async def close(self):
+        await self._client.aclose()
+
+
+if __name__ == "__main__":
+    # Offline load test: starts a local scoring server unless --url is given,
+    # then fires requests at a fixed concurrency
+    import argparse
+    import asyncio
+    import os
+    import random
+    import subprocess
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Load-test the HealthMate scoring server")
+    parser.add_argument("--url", help="existing server; default starts one from ../models")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch", type=int, default=1, help="sessions per request")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8599)
+    args = parser.parse_args()
+
+    def random_session(rng):
+        height = rng.uniform(150, 195)
+        weight = rng.uniform(45, 120)
+        return {
+            'Age': rng.randint(18, 80), 'Gender': rng.randint(0, 1),
+            'Height': height, 'Weight': weight, 'BMI': round(weight / (height / 100) ** 2, 2),
+            'Sleep_hours': rng.randint(3, 10), 'Physical_activity_mins': rng.randint(0, 90),
+            'Water_intake_liters': rng.randint(1, 4), 'Junk_food_per_week': rng.randint(0, 10),
+            'Fruit_veggies_per_day': rng.randint(0, 6), 'Family_history': rng.randint(0, 1),
+        }
+
+    async def wait_ready(client, server, deadline=120):
+        started = time.monotonic()
+        while time.monotonic() - started < deadline:
+            if server is not None and server.poll() is not None:
+                raise SystemExit("❌ Scoring server exited during startup")
+            try:
+                return await client.health()
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+        raise SystemExit("❌ Scoring server did not become ready")
+
+    async def load_test(url, server):
+        rng = random.Random(0)
+        payloads = [[random_session(rng) for _ in range(args.batch)] for _ in range(args.requests)]
+        client = ScoringClient(url, max_connections=args.concurrency)
+        await wait_ready(client, server)
+        await client.predict_batch(payloads[0])  # first request pays any lazy setup
+
+        latencies = []
+        pending = iter(payloads)
+
+        async def worker():
+            for sessions in pending:
+                started = time.perf_counter()
+                if args.batch == 1:
+                    await client.predict(sessions[0])
+                else:
+                    await client.predict_batch(sessions)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        stats = await client.health()
+        await client.close()
+
+        latencies.sort()
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))]
+        sessions = args.requests * args.batch
+        print(f"{args.requests} requests x {args.batch} sessions, concurrency {args.concurrency}")
+        print(f"throughput: {args.requests / elapsed:,.0f} req/s ({sessions / elapsed:,.0f} sessions/s)")
+        print(f"latency: p50 {percentile(50):.1f} ms  p95 {percentile(95):.1f} ms  p99 {percentile(99):.1f} ms")
+        print(f"server: {stats}")
+
+    server = None
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{args.port}"
+        server_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models",
+                                     "scoring_server.py")
+        server = subprocess.Popen([sys.executable, server_script, "--port", str(args.port),
+                                   "--workers", str(args.workers)])
+    try:
+        asyncio.run(load_test(url, server))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
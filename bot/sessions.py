@@ -0,0 +1,183 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+SESSION_DB = "bot_state.sqlite3"
+
+
+class SessionStore:
+    # Two tiers: in-progress conversations live in a bounded LRU with a TTL,
+    # completed profiles and reminder schedules go to SQLite and survive restarts.
+    # The durable tier may be called from worker threads (asyncio.to_thread), so
+    # the connection is used under a lock; the in-memory tier stays on the loop.
+
+    def __init__(self, db_path=SESSION_DB, max_active=10000, ttl_seconds=24 * 3600):
+        self.max_active = max_active
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"started": 0, "completed": 0, "evicted": 0, "expired": 0}
+        self._active = OrderedDict()  # user_id -> (session, last_touched)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS profiles (
+                user_id INTEGER PRIMARY KEY,
+                profile TEXT NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS reminders (
+                user_id INTEGER PRIMARY KEY,
+                interval REAL NOT NULL,
+                next_due REAL NOT NULL
+            );
+        """)
+        self._db.commit()
+
+    # In-progress tier: dict-style access. Handlers read with get(), which is
+    # None once a session was evicted or expired.
+    def __setitem__(self, user_id, session):
+        self._active[user_id] = (session, time.monotonic())
+        self._active.move_to_end(user_id)
+        self.stats["started"] += 1
+        self._evict()
+
+    def __getitem__(self, user_id):
+        session, touched = self._active[user_id]
+        if time.monotonic() - touched > self.ttl_seconds:
+            del self._active[user_id]
+            self.stats["expired"] += 1
+            raise KeyError(user_id)
+        self._active[user_id] = (session, time.monotonic())
+        self._active.move_to_end(user_id)
+        return session
+
+    def __contains__(self, user_id):
+        try:
+            self[user_id]
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self):
+        return len(self._active)
+
+    def get(self, user_id, default=None):
+        try:
+            return self[user_id]
+        except KeyError:
+            return default
+
+    def discard(self, user_id):
+        self._active.pop(user_id, None)
+
+    def _evict(self):
+        now = time.monotonic()
+        # Oldest entries sit at the front, so expired ones are popped first
+        while self._active:
+            user_id, (_, touched) = next(iter(self._active.items()))
+            if len(self._active) > self.max_active:
+                self.stats["evicted"] += 1
+            elif now - touched > self.ttl_seconds:
+                self.stats["expired"] += 1
+            else:
+                break
+            self._active.popitem(last=False)
+
+    # Durable tier
+    def complete(self, user_id, session=None, reminder_interval=None):
+        # Move a finished questionnaire out of memory; its profile goes to the
+        # profiles table unless the caller already saved it with save_profile
+        if session is not None:
+            self.save_profile(user_id, session, reminder_interval)
+        self.discard(user_id)
+        self.stats["completed"] += 1
+
+    def save_profile(self, user_id, session, reminder_interval=None):
+        # The profile and, with an interval, its reminder schedule in one commit
+        profile = json.dumps(session, default=float)
+        now = time.time()
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO profiles (user_id, profile, updated) VALUES (?, ?, ?)",
+                (user_id, profile, now),
+            )
+            if reminder_interval is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO reminders (user_id, interval, next_due) VALUES (?, ?, ?)",
+                    (user_id, reminder_interval, now + reminder_interval),
+                )
+            self._db.commit()
+
+    def profile(self, user_id):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT profile FROM profiles WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # Reminder schedules, rehydrated by the bot on startup
+    def schedule_reminder(self, user_id, interval, first=None):
+        first = interval if first is None else first
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO reminders (user_id, interval, next_due) VALUES (?, ?, ?)",
+                (user_id, interval, time.time() + first),
+            )
+            self._db.commit()
+
+    def reminders_sent(self, user_ids):
+        now = time.time()
+        with self._db_lock:
+            self._db.executemany(
+                "UPDATE reminders SET next_due = ? + interval WHERE user_id = ?",
+                ((now, user_id) for user_id in user_ids),
+            )
+            self._db.commit()
+
+    def cancel_reminder(self, user_id):
+        with self._db_lock:
+            self._db.execute("DELETE FROM reminders WHERE user_id = ?", (user_id,))
+            self._db.commit()
+
+    def reminders(self):
+        # (user_id, interval, seconds until next reminder, profile) per scheduled user
+        now = time.time()
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT r.user_id, r.interval, r.next_due, p.profile"
+                " FROM reminders r JOIN profiles p ON p.user_id = r.user_id"
+            ).fetchall()
+        for user_id, interval, next_due, profile in rows:
+            yield user_id, interval, max(0.0, next_due - now), json.loads(profile)
+
+    def close(self):
+        with self._db_lock:
+            self._db.close()
+
+
+if __name__ == "__main__":
+    # 100k active users: every user starts a session, most of them finish
+    import os
+    import resource
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SessionStore(os.path.join(tmp, "bench.sqlite3"), max_active=10000)
+        start = time.perf_counter()
+        for user_id in range(100000):
+            store[user_id] = {"Name": f"user{user_id}", "Age": 30, "Gender": 1}
+            store[user_id]["Sleep_hours"] = 7.0
+            if user_id % 10:
+                store.complete(user_id, store[user_id], reminder_interval=7200)
+        elapsed = time.perf_counter() - start
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        reminders = sum(1 for _ in store.reminders())
+        print(f"users: 100000 in {elapsed:.2f}s ({elapsed / 100000 * 1e6:.1f} us/user)")
+        print(f"in-memory sessions: {len(store)} (cap {store.max_active})")
+        print(f"durable reminders: {reminders}")
+        print(f"stats: {store.stats}")
+        print(f"peak RSS: {rss_mb:.1f} MB")
+        store.close()
@@ -0,0 +1,52 @@
+import asyncio
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+def user_key(update):
+    # Whose updates must stay in order: the user, else the chat; None for
+    # updates that belong to nobody
+    if isinstance(update, Update):
+        if update.effective_user is not None:
+            return update.effective_user.id
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+    return None
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    # Processes updates of different users concurrently, so their checkups
+    # overlap and the inference scheduler can batch them, while each user's
+    # updates still run one after another in arrival order, as the
+    # ConversationHandler expects.
+
+    def __init__(self, max_concurrent_updates=256):
+        super().__init__(max_concurrent_updates)
+        self._tails = {}  # user -> future resolved when their latest update is done
+
+    async def do_process_update(self, update, coroutine):
+        key = user_key(update)
+        if key is None:
+            await coroutine
+            return
+        previous = self._tails.get(key)
+        done = asyncio.get_running_loop().create_future()
+        self._tails[key] = done
+        try:
+            if previous is not None:
+                try:
+                    await asyncio.shield(previous)
+                except asyncio.CancelledError:
+                    coroutine.close()
+                    raise
+            await coroutine
+        finally:
+            done.set_result(None)
+            if self._tails.get(key) is done:
+                del self._tails[key]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
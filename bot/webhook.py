@@ -0,0 +1,328 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import metrics
+from storage import RECORD_DTYPE, RECORD_FILE, RecordWriter
+
+logger = logging.getLogger(__name__)
+
+HOST = os.environ.get("HEALTHMATE_WEBHOOK_HOST", "127.0.0.1")
+PORT = int(os.environ.get("HEALTHMATE_WEBHOOK_PORT", 8443))
+WEBHOOK_PATH = os.environ.get("HEALTHMATE_WEBHOOK_PATH", "/telegram")
+# Public URL registered with Telegram on startup (unset: register it yourself)
+WEBHOOK_URL = os.environ.get("HEALTHMATE_WEBHOOK_URL")
+# Checked against the X-Telegram-Bot-Api-Secret-Token header when set
+WEBHOOK_SECRET = os.environ.get("HEALTHMATE_WEBHOOK_SECRET")
+WORKERS = int(os.environ.get("HEALTHMATE_BOT_WORKERS", os.cpu_count() or 1))
+WORKER_START_TIMEOUT = 120
+MAX_BODY_BYTES = 1024 * 1024
+
+
+def user_id_of(update):
+    # The user an update belongs to. Every update of a user goes to the same
+    # worker, so its conversation state and session stay in one process.
+    for value in update.values():
+        if isinstance(value, dict):
+            user = value.get("from") or value.get("user") or value.get("chat") or {}
+            if "id" in user:
+                return int(user["id"])
+    return int(update.get("update_id", 0))
+
+
+class RecordForwarder:
+    # Stands in for the worker's RecordWriter: records go to the receiver
+    # process, which is the only one appending to the record store
+    flush_interval = 1.0
+
+    def __init__(self, records):
+        self._records = records
+
+    def append(self, record):
+        self._records.put((record.tobytes(), False))
+
+    def update(self, record):
+        self._records.put((record.tobytes(), True))
+
+    def flush(self, fsync=False):
+        return 0
+
+    def close(self):
+        pass
+
+
+def _worker(index, count, updates, records, processed, ready, request_factory):
+    # One bot process: the usual Application and handlers, owning users whose
+    # ID is index modulo count
+    import main as bot
+
+    bot.shard_index, bot.shard_count = index, count
+    asyncio.run(_run_worker(bot, index, updates, records, processed, ready, request_factory))
+
+
+async def _run_worker(bot, index, updates, records, processed, ready, request_factory):
+    from telegram import Update
+
+    try:
+        app = bot.build_application(request_factory() if request_factory else None,
+                                    records=RecordForwarder(records))
+        await app.initialize()
+        await bot.on_startup(app)
+        await app.start()
+    except Exception as exc:
+        ready.put(repr(exc))
+        raise
+    ready.put(index)
+
+    def done(task):
+        running.discard(task)
+        processed[index] += 1
+
+    # Users are processed concurrently and each user's updates in order, by the
+    # app's PerUserUpdateProcessor; reading pauses while it is at its limit
+    loop = asyncio.get_running_loop()
+    running = set()
+    while True:
+        if len(running) >= app.update_processor.max_concurrent_updates:
+            await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        raw = await loop.run_in_executor(None, updates.get)
+        if raw is None:
+            break
+        update = Update.de_json(json.loads(raw), app.bot)
+        task = asyncio.create_task(app.update_processor.process_update(update, app.process_update(update)))
+        running.add(task)
+        task.add_done_callback(done)
+    if running:
+        await asyncio.wait(running)
+
+    await app.stop()
+    await bot.on_shutdown(app)
+    await app.shutdown()
+
+
+class ShardedBot:
+    # N bot worker processes behind one webhook receiver. Updates are routed by
+    # user ID; the models are shared through the memory-mapped bundle, and
+    # checkup records come back here to a single RecordWriter.
+
+    def __init__(self, workers=WORKERS, record_path=RECORD_FILE, request_factory=None):
+        context = multiprocessing.get_context("spawn")
+        self.workers = workers
+        self._updates = [context.Queue() for _ in range(workers)]
+        self._records = context.Queue()
+        self._processed = context.Array("q", workers, lock=False)
+        self._lock = threading.Lock()
+        self.stats = {"routed": [0] * workers, "records": 0}
+
+        ready = context.Queue()
+        self._processes = [
+            context.Process(target=_worker, name=f"bot-worker-{i}",
+                            args=(i, workers, self._updates[i], self._records,
+                                  self._processed, ready, request_factory))
+            for i in range(workers)
+        ]
+        for process in self._processes:
+            process.start()
+        deadline = time.monotonic() + WORKER_START_TIMEOUT
+        waiting = workers
+        while waiting:
+            try:
+                started = ready.get(timeout=0.5)
+            except queue.Empty:
+                exited = [p for p in self._processes if p.exitcode is not None]
+                if exited:
+                    started = f"{exited[0].name} exited with code {exited[0].exitcode}"
+                elif time.monotonic() > deadline:
+                    started = "timed out"
+                else:
+                    continue
+            if not isinstance(started, int):
+                self._terminate()
+                raise RuntimeError(f"Bot worker failed to start: {started}")
+            waiting -= 1
+
+        self._writer = RecordWriter(record_path)
+        self._writer_thread = threading.Thread(target=self._write_records, name="record-writer",
+                                               daemon=True)
+        self._writer_thread.start()
+
+    def route(self, update, raw):
+        shard = user_id_of(update) % self.workers
+        self._updates[shard].put(raw)
+        with self._lock:
+            self.stats["routed"][shard] += 1
+        metrics.inc("webhook_updates_total", shard=shard)
+        return shard
+
+    def processed(self):
+        return list(self._processed)
+
+    def summary(self):
+        with self._lock:
+            stats = {"workers": self.workers, "routed": list(self.stats["routed"]),
+                     "records": self.stats["records"]}
+        stats["processed"] = self.processed()
+        stats["pending"] = sum(stats["routed"]) - sum(stats["processed"])
+        return stats
+
+    def _write_records(self):
+        import numpy as np
+
+        while True:
+            try:
+                item = self._records.get(timeout=self._writer.flush_interval)
+            except queue.Empty:
+                self._writer.flush()
+                continue
+            if item is None:
+                break
+            raw, replace = item
+            record = np.frombuffer(raw, dtype=RECORD_DTYPE)[0]
+            if replace:
+                self._writer.update(record)
+                continue
+            self._writer.append(record)
+            with self._lock:
+                self.stats["records"] += 1
+        self._writer.close()
+
+    def _terminate(self):
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    def close(self):
+        # Workers finish what is queued, flush their sessions, then the writer
+        # drains the last records
+        for updates in self._updates:
+            updates.put(None)
+        for process in self._processes:
+            process.join()
+        self._records.put(None)
+        self._writer_thread.join()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    # POST <path> with a Telegram update -> routed to its user's worker and
+    # acknowledged right away. GET /health -> routing stats, GET /metrics ->
+    # Prometheus text.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    bot = None
+    path_prefix = WEBHOOK_PATH
+    secret = WEBHOOK_SECRET
+
+    def _reply(self, status, payload=None):
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path != "/health":
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, self.bot.summary())
+
+    @metrics.timed("webhook_request_seconds")
+    def do_POST(self):
+        if self.path != self.path_prefix:
+            self._reply(404, {"error": "not found"})
+            return
+        if self.secret and self.headers.get("X-Telegram-Bot-Api-Secret-Token") != self.secret:
+            self._reply(403, {"error": "bad secret token"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._reply(413, {"error": "request too large"})
+            return
+        raw = self.rfile.read(length)
+        try:
+            update = json.loads(raw)
+        except ValueError:
+            self._reply(400, {"error": "invalid JSON"})
+            return
+        if not isinstance(update, dict):
+            self._reply(400, {"error": "expected an update object"})
+            return
+        self.bot.route(update, raw)
+        self._reply(200)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+class WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Telegram opens up to 40 connections at once; the default backlog is 5
+    request_queue_size = 128
+
+
+def serve(bot, host=HOST, port=PORT, path=WEBHOOK_PATH, secret=WEBHOOK_SECRET):
+    handler = type("Handler", (WebhookHandler,), {"bot": bot, "path_prefix": path, "secret": secret})
+    return WebhookServer((host, port), handler)
+
+
+def register_webhook(url, secret=WEBHOOK_SECRET):
+    from telegram import Bot
+    from main import TOKEN
+
+    async def register():
+        async with Bot(TOKEN) as telegram_bot:
+            await telegram_bot.set_webhook(url, secret_token=secret)
+
+    asyncio.run(register())
+
+
+def run(workers=WORKERS, host=HOST, port=PORT, path=WEBHOOK_PATH):
+    started = time.perf_counter()
+    bot = ShardedBot(workers)
+    server = serve(bot, host, port, path)
+    if WEBHOOK_URL:
+        register_webhook(WEBHOOK_URL)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # shut down like Ctrl-C
+    print(f"🤖 HealthMate AI Bot webhook on http://{host}:{port}{path} "
+          f"({workers} workers ready in {time.perf_counter() - started:.1f}s)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        bot.close()
+        logger.info("Webhook stats: %s", bot.summary())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HealthMate bot webhook with sharded workers")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--path", default=WEBHOOK_PATH)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run(args.workers, args.host, args.port, args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,110 @@
+import os
+import sys
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from io import BytesIO
-from fpdf import FPDF
-import urllib.parse
-
-# Load all user data once
-@st.cache_data
-def load_data():
-    try:
-        df = pd.read_csv("user_health_data.csv")
-        return df
-    except FileNotFoundError:
-        return pd.DataFrame()  # empty if no data yet
-
-def generate_wellness_plan(risks):
-    plan = []
-    # Simple logic to create plan based on high risks
-    if risks.get('Diabetes_risk', 0) > 50:
-        plan.append("Walk 30 mins daily")
-        plan.append("Limit sugar intake")
-    if risks.get('Heart_Disease_risk', 0) > 50:
-        plan.append("Avoid saturated fats")
-        plan.append("Monitor blood pressure")
-    if risks.get('Stress_Burnout_risk', 0) > 50:
-        plan.append("Practice meditation")
-        plan.append("Take regular breaks")
-    if not plan:
-        plan = ["Maintain balanced diet", "Exercise regularly", "Stay hydrated"]
-    return plan
-
-def create_pdf_report(name, risks, plan):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, f"HealthMate AI Report for {name}", ln=True, align="C")
-
-    pdf.set_font("Arial", "", 12)
-    pdf.ln(10)
-    pdf.cell(0, 10, "Disease Risk Summary:", ln=True)
-    for disease, risk in risks.items():
-        pdf.cell(0, 10, f"{disease.replace('_risk','')}: {risk}%", ln=True)
-
-    pdf.ln(10)
-    pdf.cell(0, 10, "7-Day Wellness Plan:", ln=True)
-    for task in plan:
-        pdf.cell(0, 10, f"- {task}", ln=True)
-
-    output = BytesIO()
-    pdf.output(output)
-    return output.getvalue()
+
+# Heavy modules (pandas, plotly, fpdf, numpy via storage) are imported on first
+# use, so the missing/invalid user_id paths render without loading them.
+
+# Shared record store lives next to the models
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models"))
+import metrics
+from utils import generate_wellness_plan
+
+# Local /metrics endpoint when HEALTHMATE_METRICS=1 (see models/metrics.py)
+METRICS_PORT = int(os.environ.get("HEALTHMATE_DASHBOARD_METRICS_PORT", 9101))
+
+# Only the user's own rows are read via the store's user-ID index. The cache is
+# keyed on the store generation, so a new checkup invalidates it.
+@st.cache_data(max_entries=10000)
+@metrics.timed("dashboard_load_seconds")
+def load_user_data(user_id, generation):
+    from storage import RECORD_FILE, read_user_records, records_to_frame
+
+    return records_to_frame(read_user_records(user_id, RECORD_FILE))
+
+# One /metrics server per Streamlit process
+@st.cache_resource
+def metrics_endpoint():
+    return metrics.serve(METRICS_PORT) if metrics.ENABLED else None
+
+# One aggregate table per server process, shared across sessions
+@st.cache_resource
+def cohort_aggregates():
+    from cohorts import CohortAggregates
+    from storage import RECORD_FILE
+
+    return CohortAggregates(RECORD_FILE)
+
+# Fold in checkups saved since the last page view; a no-op while the store
+# generation is unchanged
+@st.cache_data(max_entries=1)
+def refresh_cohorts(generation):
+    return cohort_aggregates().refresh()
+
+# Sliders in the what-if simulator, by feature_order name
+WHATIF_SLIDERS = {
+    'Sleep_hours': "😴 Sleep (hours/night)",
+    'Physical_activity_mins': "🏃 Physical activity (minutes/day)",
+    'Junk_food_per_week': "🍔 Junk food (meals/week)",
+    'Water_intake_liters': "💧 Water (liters/day)",
+}
+
+# The sweep is scored once per user, checkup (its Timestamp) and model version,
+# so other users' checkups leave it cached; slider moves only re-combine cached
+# rows. Arguments with a leading underscore are not hashed.
+@st.cache_data(max_entries=10000)
+def whatif_sweep_for(user_id, checkup_time, model_version, _user_data):
+    from predict import whatif_sweep
+
+    return whatif_sweep(_user_data)
+
+def whatif_inputs(user_info):
+    # Latest checkup -> answers keyed like the bot's sessions; blanks fall back
+    # to checkup.DEFAULTS
+    import math
+    from storage import SESSION_FIELDS
+
+    answers = {}
+    for key in ('Age', 'BMI', 'Sleep_hours', 'Physical_activity_mins', 'Water_intake_liters',
+                'Junk_food_per_week', 'Fruit_veggies_per_day', 'Family_history'):
+        value = float(user_info.get(SESSION_FIELDS.get(key, key), math.nan))
+        if not math.isnan(value) and not (key == 'Family_history' and value > 1):
+            answers[key] = value
+    answers['Gender'] = 1 if user_info.get('Gender') == 'Male' else 0
+    return answers
+
+# A fragment, so a slider move reruns only this panel, not the whole page
+@st.fragment
+@metrics.timed("dashboard_render_seconds", section="whatif")
+def whatif_panel(user_id, user_info):
+    import plotly.graph_objects as go
+    from predict import WHATIF_GRIDS, feature_order, reload_if_changed, whatif_risks
+
+    sweep = whatif_sweep_for(user_id, float(user_info["Timestamp"]), reload_if_changed(),
+                             whatif_inputs(user_info))
+    adjustments = {}
+    for feature, label in WHATIF_SLIDERS.items():
+        grid = WHATIF_GRIDS[feature]
+        step = float(grid[1] - grid[0])
+        current = float(sweep["base_features"][feature_order.index(feature)])
+        current = min(max(round(current / step) * step, float(grid[0])), float(grid[-1]))
+        adjustments[feature] = st.slider(label, float(grid[0]), float(grid[-1]), current, step)
+
+    simulated = whatif_risks(sweep, adjustments)
+    labels = [col.replace('_risk','').replace('_', ' ') for col in simulated]
+    fig = go.Figure([
+        go.Bar(name="Now", x=labels, y=[float(r) for r in sweep["base"]]),
+        go.Bar(name="What-if", x=labels, y=[float(r) for r in simulated.values()]),
+    ])
+    fig.update_layout(barmode="group", title="Simulated Risk Probabilities", yaxis_title="Risk (%)")
+    st.plotly_chart(fig, use_container_width=True)
 
 def main():
     st.set_page_config(page_title="HealthMate AI Dashboard", layout="centered")
+    metrics_endpoint()
 
     st.title("🤖 HealthMate AI Wellness Dashboard")
     
-    df = pd.read_csv("user_health_data.csv")
-
     params = st.query_params
     user_id = params.get("user_id")
 
@@ -71,20 +118,25 @@ def main():
         st.error("Invalid user_id format. It should be a number.")
         st.stop()
 
-    user_data = df[df["UserID"] == user_id]
+    from storage import DISEASES, RECORD_FILE, store_generation
+
+    generation = store_generation(RECORD_FILE)
+    user_data = load_user_data(user_id, generation)
     if user_data.empty:
         st.error("No data found for your user ID. Please complete your health checkup first.")
         st.stop()
 
-    user_info = user_data.iloc[0]
+    user_info = user_data.iloc[-1]  # latest checkup
     name = user_info.get("Name", "Friend")
 
     st.header(f"Hello, {name}!")
     st.write("Here is your personalized health risk summary and wellness plan.")
 
-    # Extract risk columns ending with '_risk'
-    risk_cols = [col for col in df.columns if col.endswith('_risk')]
-    risks = {col: round(user_info[col], 2) for col in risk_cols if col in user_info}
+    # One risk column per disease model
+    risks = {col: round(float(user_info[col]), 2) for col in DISEASES if col in user_info}
+
+    import pandas as pd
+    import plotly.express as px
 
     # Bar chart of risks
     risk_df = pd.DataFrame({
@@ -92,12 +144,40 @@ def main():
         "Risk (%)": list(risks.values())
     })
 
-    fig = px.bar(risk_df, x="Disease", y="Risk (%)", color="Risk (%)",
-                 color_continuous_scale='RdYlGn_r',
-                 labels={"Risk (%)": "Risk Percentage"},
-                 title="Your Disease Risk Probabilities")
-
-    st.plotly_chart(fig, use_container_width=True)
+    with metrics.timer("dashboard_render_seconds", section="risk_chart"):
+        fig = px.bar(risk_df, x="Disease", y="Risk (%)", color="Risk (%)",
+                     color_continuous_scale='RdYlGn_r',
+                     labels={"Risk (%)": "Risk Percentage"},
+                     title="Your Disease Risk Probabilities")
+
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Compare against the user's age/gender/BMI cohort
+    with metrics.timer("dashboard_cohort_seconds"):
+        refresh_cohorts(generation)
+    comparison = cohort_aggregates().compare(
+        float(user_info["Age"]), 1 if user_info["Gender"] == "Male" else 0,
+        float(user_info["BMI"]), risks)
+    if comparison["count"] > 1:
+        st.subheader("How You Compare")
+        st.caption(f"Cohort: {comparison['cohort']} ({comparison['count']:,} checkups)")
+        cohort_df = pd.DataFrame({
+            "Disease": list(risk_df["Disease"]) * 2,
+            "Risk (%)": list(risks.values()) + [comparison["diseases"][col]["mean"] for col in risks],
+            "Who": ["You"] * len(risks) + ["Cohort average"] * len(risks),
+        })
+        with metrics.timer("dashboard_render_seconds", section="cohort_chart"):
+            st.plotly_chart(px.bar(cohort_df, x="Disease", y="Risk (%)", color="Who", barmode="group"),
+                            use_container_width=True)
+        for col, risk in risks.items():
+            percentile = comparison["diseases"][col]["percentile"]
+            if percentile is not None and risk >= 20:
+                st.markdown(f"- {col.replace('_risk','').replace('_', ' ')}: higher than "
+                            f"{percentile:.0f}% of your cohort")
+
+    # What-if mode: move lifestyle sliders and watch the risks respond
+    if st.toggle("🔮 What-if simulator"):
+        whatif_panel(user_id, user_info)
 
     # Generate wellness plan based on risks
     wellness_plan = generate_wellness_plan(risks)
@@ -108,9 +188,15 @@ def main():
         for task in wellness_plan:
             st.markdown(f"- {task}")
 
-    # PDF report download
-    if st.button("Download Your Personalized PDF Report"):
-        pdf_bytes = create_pdf_report(name, risks, wellness_plan)
+    # PDF report download, served from the report cache when pre-rendered
+    from reports import cached_report, report_for_user
+
+    with metrics.timer("dashboard_report_seconds", source="cache"):
+        pdf_bytes = cached_report(user_id)
+    if pdf_bytes is None and st.button("Download Your Personalized PDF Report"):
+        with metrics.timer("dashboard_report_seconds", source="render"):
+            pdf_bytes = report_for_user(user_id)
+    if pdf_bytes is not None:
         st.download_button("Click to download PDF", pdf_bytes, file_name=f"HealthMateAI_Report_{name}.pdf", mime="application/pdf")
 
     st.info("💡 Remember: This dashboard updates automatically after each health checkup via the Telegram bot!")
@@ -0,0 +1,282 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models"))
+from storage import DISEASES, RECORD_FILE, find_user_records, latest_revisions, read_records
+from rules import records_batch, wellness_plans
+
+# Bump whenever create_pdf_report's layout changes so cached files are not reused
+TEMPLATE_VERSION = 1
+REPORT_CACHE_DIR = "report_cache"
+MAX_CACHE_BYTES = int(os.environ.get("HEALTHMATE_REPORT_CACHE_BYTES", 256 * 1024 * 1024))
+WATERMARK_FILE = "watermark"
+
+
+def _latin1(text):
+    # The core PDF fonts only cover latin-1
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+
+def create_pdf_report(name, risks, plan):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, _latin1(f"HealthMate AI Report for {name}"), ln=True, align="C")
+
+    pdf.set_font("Arial", "", 12)
+    pdf.ln(10)
+    pdf.cell(0, 10, "Disease Risk Summary:", ln=True)
+    for disease, risk in risks.items():
+        pdf.cell(0, 10, _latin1(f"{disease.replace('_risk','')}: {risk}%"), ln=True)
+
+    pdf.ln(10)
+    pdf.cell(0, 10, "7-Day Wellness Plan:", ln=True)
+    for task in plan:
+        pdf.cell(0, 10, _latin1(f"- {task}"), ln=True)
+
+    output = pdf.output(dest="S")
+    # fpdf 1.x returns a latin-1 str, fpdf2 a bytearray
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+
+class ReportCache:
+    # Content-addressed PDFs on local disk, evicted least-recently-used first
+    # once the directory grows past max_bytes.
+
+    def __init__(self, directory=REPORT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._total_bytes = None  # running estimate; rescanned when over budget
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(user_id, generation):
+        raw = f"{user_id}:{generation}:{TEMPLATE_VERSION}".encode()
+        return hashlib.sha256(raw).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            return None  # evicted by another process since the read
+        return data
+
+    def put(self, key, data):
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._total_bytes is None:
+                self._evict()
+            else:
+                self._total_bytes += len(data)
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+        return path
+
+    def evict(self):
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".pdf"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total_bytes = total
+
+
+_caches = {}  # (directory, max_bytes) -> this process's ReportCache
+
+
+def report_cache(directory=REPORT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    # One ReportCache per directory in each process, so the size estimate
+    # carries over between reports and only the first put scans the directory
+    key = (directory, max_bytes)
+    if key not in _caches:
+        _caches.setdefault(key, ReportCache(directory, max_bytes))
+    return _caches[key]
+
+
+def _latest_record(user_id, path, records=None):
+    # (generation, record) for the user's latest checkup; the record number is
+    # the generation, so a new checkup or a re-save of it changes the cache key
+    if records is None:
+        records = read_records(path)
+    numbers = find_user_records(user_id, path, records)
+    numbers = latest_revisions(numbers[numbers < len(records)], records)
+    if len(numbers) == 0:
+        return None, None
+    return int(numbers[-1]), records[numbers[-1]]
+
+
+def _report_inputs(records):
+    # (name, risks, plan) per record, with the plans matched for all of them
+    # in one pass over the rule table. Risks are rounded as the dashboard
+    # shows them, so a report's plan is the one on screen.
+    batch = records_batch(records, DISEASES)
+    for disease in DISEASES:
+        batch[disease] = np.round(batch[disease].astype(np.float64), 2)
+    inputs = []
+    for i, plan in enumerate(wellness_plans(batch)):
+        name = records['Name'][i].decode('utf-8', 'replace') or "Friend"
+        risks = {disease: float(batch[disease][i]) for disease in DISEASES}
+        inputs.append((name, risks, plan))
+    return inputs
+
+
+def cached_report(user_id, path=RECORD_FILE, cache=None):
+    generation, _ = _latest_record(user_id, path)
+    if generation is None:
+        return None
+    return (cache or report_cache()).get(ReportCache.key(user_id, generation))
+
+
+def report_for_user(user_id, path=RECORD_FILE, cache=None):
+    cache = cache or report_cache()
+    generation, record = _latest_record(user_id, path)
+    if generation is None:
+        return None
+    key = ReportCache.key(user_id, generation)
+    data = cache.get(key)
+    if data is None:
+        data = create_pdf_report(*_report_inputs(np.asarray(record)[np.newaxis])[0])
+        cache.put(key, data)
+    return data
+
+
+def _render_one(args):
+    key, inputs, directory, max_bytes = args
+    report_cache(directory, max_bytes).put(key, create_pdf_report(*inputs))
+    return key
+
+
+def prerender(user_ids, path=RECORD_FILE, cache=None, workers=None):
+    # Render a batch of reports in a process pool; already-cached ones are
+    # skipped. Returns how many were rendered.
+    cache = cache or report_cache()
+    records = read_records(path)
+    keys, latest = [], []
+    for user_id in dict.fromkeys(user_ids):
+        generation, _ = _latest_record(user_id, path, records)
+        if generation is None:
+            continue
+        key = ReportCache.key(user_id, generation)
+        if not os.path.exists(cache.path(key)):
+            keys.append(key)
+            latest.append(generation)
+    if not keys:
+        return 0
+    jobs = [(key, inputs, cache.directory, cache.max_bytes)
+            for key, inputs in zip(keys, _report_inputs(records[latest]))]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(1 for _ in pool.map(_render_one, jobs, chunksize=16))
+
+
+def watch(path=RECORD_FILE, cache=None, poll_interval=2.0, workers=None):
+    # Follow the record store and pre-render reports for users who just saved a
+    # checkup, so the dashboard can serve a finished file
+    cache = cache or report_cache()
+    watermark_path = os.path.join(cache.directory, WATERMARK_FILE)
+    try:
+        with open(watermark_path) as f:
+            seen = int(f.read().strip() or 0)
+    except FileNotFoundError:
+        seen = 0
+    while True:
+        records = read_records(path)
+        if len(records) > seen:
+            user_ids = [int(user_id) for user_id in records['UserID'][seen:]]
+            rendered = prerender(user_ids, path, cache, workers)
+            seen = len(records)
+            with open(watermark_path, "w") as f:
+                f.write(str(seen))
+            print(f"📄 Pre-rendered {rendered} reports (watermark {seen})")
+        time.sleep(poll_interval)
+
+
+def benchmark(users=1000, concurrency=64):
+    # p95 download latency for `users` simultaneous requests, cold vs pre-rendered
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from storage import RecordWriter, make_record
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = os.path.join(tmp, "bench.rec")
+        writer = RecordWriter(store, max_buffered=4096)
+        rng = np.random.default_rng(0)
+        for user_id in range(users):
+            predictions = {d: float(rng.uniform(0, 100)) for d in DISEASES}
+            writer.append(make_record(user_id, {'Name': f"user{user_id}", 'Predictions': predictions}))
+        writer.close()
+
+        def timed(cache):
+            def one(user_id):
+                start = time.perf_counter()
+                report_for_user(user_id, store, cache)
+                return (time.perf_counter() - start) * 1000
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                return np.array(list(pool.map(one, range(users))))
+
+        cold = timed(ReportCache(os.path.join(tmp, "cold")))
+        warm_cache = ReportCache(os.path.join(tmp, "warm"))
+        start = time.perf_counter()
+        prerender(range(users), store, warm_cache)
+        prerender_seconds = time.perf_counter() - start
+        warm = timed(warm_cache)
+
+        print(f"{users} users, {concurrency} concurrent requests")
+        print(f"render on click:  p50 {np.percentile(cold, 50):7.2f} ms  p95 {np.percentile(cold, 95):7.2f} ms")
+        print(f"pre-rendered:     p50 {np.percentile(warm, 50):7.2f} ms  p95 {np.percentile(warm, 95):7.2f} ms")
+        print(f"background pre-render of {users} reports: {prerender_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HealthMate PDF report cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    watch_parser = subparsers.add_parser("watch", help="pre-render reports as checkups are saved")
+    watch_parser.add_argument("--store", default=RECORD_FILE)
+    watch_parser.add_argument("--workers", type=int, default=None)
+    bench_parser = subparsers.add_parser("bench", help="p95 latency for simultaneous downloads")
+    bench_parser.add_argument("--users", type=int, default=1000)
+    bench_parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.command == "watch":
+        watch(args.store, workers=args.workers)
+    else:
+        benchmark(args.users, args.concurrency)
@@ -1 +1,7 @@
+from rules import wellness_plan
 
+
+def generate_wellness_plan(risks):
+    # Plans come from the shared rule table (models/rules.py), keyed on the
+    # model names the bot actually stores
+    return wellness_plan(risks)
@@ -0,0 +1,189 @@
+import numpy as np
+
+# Column order the forests were trained on (see models/model.py)
+FEATURES = [
+    'Age', 'Gender', 'BMI', 'Sleep_hours', 'Physical_activity_mins',
+    'Water_intake_liters', 'Screen_time_hrs', 'Stress_level',
+    'Work_study_pressure', 'Junk_food_per_week', 'Fruit_veggies_per_day',
+    'Social_interaction_hrs', 'Family_history'
+]
+COLUMN = {name: i for i, name in enumerate(FEATURES)}
+
+# Feature values until a user answers; the bot never asks about screen time,
+# stress, work pressure or social time, so those stay 0
+DEFAULTS = {
+    'Age': 30, 'Gender': 0, 'BMI': 24.22, 'Sleep_hours': 7, 'Physical_activity_mins': 0,
+    'Water_intake_liters': 2, 'Screen_time_hrs': 0, 'Stress_level': 0,
+    'Work_study_pressure': 0, 'Junk_food_per_week': 0, 'Fruit_veggies_per_day': 3,
+    'Social_interaction_hrs': 0, 'Family_history': 0,
+}
+DEFAULT_ROW = np.array([DEFAULTS[name] for name in FEATURES], dtype=np.float32)
+
+# Numeric questions: type and accepted range
+NUMBERS = {
+    'Age': (int, 1, 120),
+    'Height': (float, 50, 250),
+    'Weight': (float, 20, 350),
+    'Sleep_hours': (float, 0, 24),
+    'Physical_activity_mins': (float, 0, 1440),
+    'Water_intake_liters': (float, 0, 15),
+    'Junk_food_per_week': (int, 0, 100),
+    'Fruit_veggies_per_day': (int, 0, 50),
+    'Lifestyle_freq': (int, 0, 100),
+}
+# Keyboard questions: accepted reply (any case) -> stored value
+CHOICES = {
+    'Gender': {'male': 1, 'female': 0},  # as encoded in training (Female=0, Male=1)
+    'Family_history': {'yes': 1, 'no': 0},
+    'Lifestyle': {'no': 'no', 'smoking': 'smoking', 'alcohol': 'alcohol', 'both': 'both'},
+}
+INTEGERS = {key for key, (kind, _, _) in NUMBERS.items() if kind is int} | {'Gender', 'Family_history'}
+
+
+def calculate_bmi(weight_kg, height_cm):
+    height_m = height_cm / 100
+    bmi = weight_kg / (height_m ** 2)
+    return round(bmi, 2)
+
+
+def parse_answer(key, text):
+    # A reply typed in chat -> the value stored for `key`. ValueError carries
+    # the message to send back when the reply doesn't fit the question.
+    text = str(text).strip()
+    if key in CHOICES:
+        choices = CHOICES[key]
+        if text.lower() not in choices:
+            raise ValueError(f"Please choose one of: {', '.join(c.title() for c in choices)}.")
+        return choices[text.lower()]
+    kind, low, high = NUMBERS[key]
+    try:
+        value = float(text.replace(',', '.'))
+    except ValueError:
+        value = float('nan')
+    if kind is int:
+        if not (low <= value <= high and value.is_integer()):
+            raise ValueError(f"Please send a whole number between {low} and {high}.")
+        return int(value)
+    if not low <= value <= high:
+        raise ValueError(f"Please send a number between {low} and {high}.")
+    return value
+
+
+def clean_session(session):
+    # A session dict from outside the bot (e.g. a scoring server client) ->
+    # a copy with answers parsed as the bot stores them. ValueError names the
+    # first value the models can't score.
+    cleaned = dict(session)
+    for key, value in session.items():
+        if value is None:
+            continue
+        if key in CHOICES and key in COLUMN:
+            choices = set(CHOICES[key].values())
+            if value not in choices and str(value).strip().lower() not in CHOICES[key]:
+                raise ValueError(f"{key}: expected one of {sorted(choices)}")
+            cleaned[key] = value if value in choices else parse_answer(key, value)
+        elif key in NUMBERS:
+            try:
+                cleaned[key] = parse_answer(key, value)
+            except ValueError as e:
+                raise ValueError(f"{key}: {e}") from None
+        elif key in COLUMN:
+            try:
+                cleaned[key] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key}: expected a number") from None
+            if not np.isfinite(cleaned[key]):
+                raise ValueError(f"{key}: expected a number")
+    return cleaned
+
+
+def _native(key, value):
+    # float32 -> Python number, keeping the shortest repr (24.22, not 24.2199993)
+    return int(value) if key in INTEGERS else float(str(value))
+
+
+class Checkup:
+    # One user's answers while the bot asks its questions. Model features are
+    # written in place into a float32 row in training column order, which
+    # predict scores as is. Reads by key (get, [], in) return what a session
+    # dict would, so records, rules and profiles take a Checkup unchanged.
+    __slots__ = ('Name', 'Height', 'Weight', 'Lifestyle', 'Lifestyle_freq', 'Predictions',
+                 'features', '_answered')
+    OTHER_KEYS = ('Name', 'Height', 'Weight', 'Lifestyle', 'Lifestyle_freq', 'Predictions')
+    KEYS = ('Name', 'Age', 'Gender', 'Height', 'Weight', *FEATURES[2:], 'Lifestyle', 'Lifestyle_freq',
+            'Predictions')  # in question order, as a session dict had them
+
+    def __init__(self, name=''):
+        self.Name = name
+        self.Height = self.Weight = self.Lifestyle = self.Lifestyle_freq = self.Predictions = None
+        self.features = DEFAULT_ROW.copy()
+        self._answered = 0  # bit per FEATURES column the user has answered
+
+    def answer(self, key, text):
+        # Validates and stores a chat reply; raises ValueError for the user
+        value = parse_answer(key, text)
+        self[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        column = COLUMN.get(key)
+        if column is not None:
+            self.features[column] = value
+            self._answered |= 1 << column
+        elif key in self.OTHER_KEYS:
+            setattr(self, key, value)
+        else:
+            raise KeyError(key)
+        if key in ('Height', 'Weight') and self.Height and self.Weight:
+            self['BMI'] = calculate_bmi(self.Weight, self.Height)
+
+    def __getitem__(self, key):
+        column = COLUMN.get(key)
+        if column is not None:
+            if not self._answered & (1 << column):
+                raise KeyError(key)
+            return _native(key, self.features[column])
+        if key not in self.OTHER_KEYS or getattr(self, key) is None:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [key for key in self.KEYS if key in self]
+
+    def to_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    def copy(self):
+        checkup = Checkup.__new__(Checkup)
+        for slot in self.__slots__:
+            setattr(checkup, slot, getattr(self, slot))
+        checkup.features = self.features.copy()
+        return checkup
+
+
+def feature_row(user_data):
+    # A Checkup's own row, or a float32 row from a dict of answers keyed like
+    # the bot's sessions (BMI from Height/Weight when it isn't given)
+    if isinstance(user_data, Checkup):
+        return user_data.features
+    row = DEFAULT_ROW.copy()
+    for name, column in COLUMN.items():
+        value = user_data.get(name)
+        if value is not None:
+            row[column] = value
+    if user_data.get('BMI') is None and user_data.get('Height') and user_data.get('Weight'):
+        row[COLUMN['BMI']] = calculate_bmi(user_data['Weight'], user_data['Height'])
+    return row
@@ -0,0 +1,138 @@
+import os
+import threading
+import numpy as np
+from storage import DISEASES, RECORD_FILE, previous_revision, read_records
+
+# Cohorts are (age band, gender, BMI band); bands are right-open intervals
+AGE_EDGES = np.array([18, 25, 35, 45, 55, 65])        # <18, 18-24, ..., 65+
+AGE_LABELS = ['<18', '18-24', '25-34', '35-44', '45-54', '55-64', '65+']
+BMI_EDGES = np.array([18.5, 25, 30])                  # under, healthy, over, obese
+BMI_LABELS = ['underweight', 'healthy', 'overweight', 'obese']
+GENDER_LABELS = ['Female', 'Male']
+RISK_BINS = 20                                        # 5-point risk % buckets
+AGGREGATE_SUFFIX = ".cohorts.npz"
+CHUNK_RECORDS = 1_000_000
+
+
+def cohort_index(age, gender, bmi):
+    # Works on scalars or arrays -> (age band, gender, BMI band)
+    return (np.searchsorted(AGE_EDGES, age, side='right'),
+            np.asarray(gender, dtype=np.int64),
+            np.searchsorted(BMI_EDGES, bmi, side='right'))
+
+
+class CohortAggregates:
+    # Per-cohort counts, per-disease risk sums and risk histograms, folded in
+    # incrementally from the record store. The watermark is the number of
+    # records applied, so a restart replays only the tail of the log. A re-saved
+    # checkup (Revision > 0) takes the place of the revision it supersedes.
+
+    def __init__(self, store_path=RECORD_FILE, path=None):
+        self.store_path = store_path
+        self.path = path or store_path + AGGREGATE_SUFFIX
+        self._lock = threading.Lock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        shape = (len(AGE_LABELS), len(GENDER_LABELS), len(BMI_LABELS))
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.sums = np.zeros(shape + (len(DISEASES),), dtype=np.float64)
+        self.hist = np.zeros(shape + (len(DISEASES), RISK_BINS), dtype=np.int64)
+        self.watermark = 0
+
+    def _load(self):
+        try:
+            with np.load(self.path) as saved:
+                if tuple(saved['diseases']) != tuple(DISEASES):
+                    return  # schema changed: rebuild from the log
+                arrays = saved['counts'], saved['sums'], saved['hist'], int(saved['watermark'])
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            return  # missing or damaged snapshot: replay from record 0
+        if arrays[0].shape == self.counts.shape and arrays[2].shape == self.hist.shape:
+            self.counts, self.sums, self.hist, self.watermark = arrays
+
+    def save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, counts=self.counts, sums=self.sums, hist=self.hist,
+                 watermark=self.watermark, diseases=np.array(DISEASES))
+        os.replace(tmp_path, self.path)
+
+    def apply(self, records, sign=1):
+        # Fold a batch of store records into the aggregates (sign=-1 takes
+        # them back out)
+        probabilities = np.asarray(records['Probabilities'], dtype=np.float64)
+        age = np.asarray(records['Age'], dtype=np.float64)
+        bmi = np.asarray(records['BMI'], dtype=np.float64)
+        gender = np.asarray(records['Gender'])
+        valid = ~(np.isnan(age) | np.isnan(bmi) | np.isnan(probabilities).any(axis=1))
+        valid &= gender < len(GENDER_LABELS)  # unknown gender has no cohort
+        a, g, b = cohort_index(age[valid], gender[valid], bmi[valid])
+        probabilities = probabilities[valid]
+
+        np.add.at(self.counts, (a, g, b), sign)
+        np.add.at(self.sums, (a, g, b), sign * probabilities)
+        risk_bin = np.clip((probabilities / (100 / RISK_BINS)).astype(np.int64), 0, RISK_BINS - 1)
+        disease = np.broadcast_to(np.arange(len(DISEASES)), risk_bin.shape)
+        np.add.at(self.hist, (a[:, None], g[:, None], b[:, None], disease, risk_bin), sign)
+
+    def refresh(self, save_every=10000):
+        # Apply records appended since the watermark; O(new records)
+        with self._lock:
+            records = read_records(self.store_path)
+            if len(records) < self.watermark:
+                # The store was replaced or truncated: replay it from scratch
+                self._reset()
+            start = self.watermark
+            while self.watermark < len(records):
+                end = min(self.watermark + CHUNK_RECORDS, len(records))
+                chunk = records[self.watermark:end]
+                self.apply(chunk)
+                revised = self.watermark + np.flatnonzero(chunk['Revision'] > 0)
+                superseded = [previous_revision(int(number), records, self.store_path) for number in revised]
+                superseded = [number for number in superseded if number is not None]
+                if superseded:
+                    self.apply(records[superseded], sign=-1)
+                self.watermark = end
+            if self.watermark - start >= save_every or (start == 0 and self.watermark):
+                self.save()
+            return self.watermark - start
+
+    def compare(self, age, gender, bmi, risks):
+        # O(1) cohort view for one user: size, mean risk per disease and the share
+        # of the cohort whose risk is below the user's
+        a, g, b = (int(i) for i in cohort_index(age, gender, bmi))
+        count = int(self.counts[a, g, b])
+        label = f"{GENDER_LABELS[g]}, {AGE_LABELS[a]}, {BMI_LABELS[b]} BMI"
+        if count == 0:
+            return {"cohort": label, "count": 0, "diseases": {}}
+        mean = self.sums[a, g, b] / count
+        below = np.cumsum(self.hist[a, g, b], axis=1)
+        diseases = {}
+        for i, disease in enumerate(DISEASES):
+            risk = risks.get(disease)
+            percentile = None
+            if risk is not None and not np.isnan(risk):
+                user_bin = min(int(risk / (100 / RISK_BINS)), RISK_BINS - 1)
+                strictly_below = below[i, user_bin - 1] if user_bin else 0
+                percentile = 100 * float(strictly_below) / count
+            diseases[disease] = {"mean": float(mean[i]), "percentile": percentile}
+        return {"cohort": label, "count": count, "diseases": diseases}
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Rebuild or refresh cohort aggregates")
+    parser.add_argument("store", nargs="?", default=RECORD_FILE)
+    parser.add_argument("--rebuild", action="store_true", help="replay the whole record log")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(args.store + AGGREGATE_SUFFIX):
+        os.remove(args.store + AGGREGATE_SUFFIX)
+    start = time.perf_counter()
+    aggregates = CohortAggregates(args.store)
+    applied = aggregates.refresh(save_every=0)
+    print(f"✅ Applied {applied:,} records in {time.perf_counter() - start:.2f}s "
+          f"(watermark {aggregates.watermark:,}, {int((aggregates.counts > 0).sum())} non-empty cohorts)")
@@ -0,0 +1,167 @@
+import os
+import time
+import numpy as np
+from forest_bundle import apply_trees
+
+# Distilled stand-in for the forests: one small multi-output regression-tree
+# ensemble fitted to the forests' probabilities, for replies that shouldn't
+# wait on all ten forests. model.py writes it next to the forest bundle.
+FAST_MODEL_FILE = "healthmate_fast.npz"
+FAST_TREES = 16
+FAST_MAX_DEPTH = 12
+DISTILL_ROWS = 30000
+# Accuracy loss the fast model may have against the forests on held-out
+# inputs (averaged over diseases); a worse fit is not shipped
+FAST_MAX_MAE_PP = 5.0
+FAST_MIN_LABEL_AGREEMENT = 0.90
+# Questions the bot doesn't ask; their checkup.DEFAULTS are 0
+UNASKED_FEATURES = ['Screen_time_hrs', 'Stress_level', 'Work_study_pressure', 'Social_interaction_hrs']
+
+
+def distillation_inputs(X, features, rows=DISTILL_ROWS, seed=0):
+    # Where the fast model has to agree with the forests: a third real rows, a
+    # third independent draws from each column's values (combinations the
+    # dataset lacks), and a third of those shaped like bot requests
+    rng = np.random.default_rng(seed)
+    X = np.asarray(X, dtype=np.float64)
+
+    def marginals(n):
+        return np.column_stack([rng.choice(X[:, j], n) for j in range(X.shape[1])])
+
+    third = rows // 3
+    bot_rows = marginals(rows - 2 * third)
+    bot_rows[:, [features.index(name) for name in UNASKED_FEATURES]] = 0
+    return np.vstack([X[rng.integers(len(X), size=third)], marginals(third), bot_rows])
+
+
+def write_fast_model(model, path, features, diseases, inputs):
+    # Same flattened node layout as the forest bundle, with one value per
+    # disease at every node. The distillation inputs are kept so the model can
+    # be refitted when the forests change.
+    roots, feature, threshold, left, right, value = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        roots.append(offset)
+        feature.append(tree.feature.astype(np.int32))
+        threshold.append(tree.threshold.astype(np.float64))
+        left.append(np.where(is_leaf, -1, tree.children_left + offset).astype(np.int32))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset).astype(np.int32))
+        value.append(tree.value[:, :, 0])
+        max_depth = max(max_depth, int(tree.max_depth))
+        offset += tree.node_count
+
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(
+        tmp_path,
+        tree_roots=np.asarray(roots, dtype=np.int64),
+        feature=np.concatenate(feature),
+        threshold=np.concatenate(threshold),
+        left=np.concatenate(left),
+        right=np.concatenate(right),
+        value=np.concatenate(value),
+        max_depth=np.int64(max_depth),
+        features=np.asarray(features),
+        diseases=np.asarray(diseases),
+        inputs=np.asarray(inputs, dtype=np.float32),
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+class FastModel:
+    def __init__(self, path=FAST_MODEL_FILE):
+        with np.load(path) as data:
+            for name in ("tree_roots", "feature", "threshold", "left", "right", "value"):
+                setattr(self, name, data[name])
+            self.max_depth = int(data["max_depth"])
+            self.features = [str(name) for name in data["features"]]
+            self.diseases = [str(name) for name in data["diseases"]]
+        self.path = path
+
+    def predict(self, X):
+        # (n_rows, n_diseases) probabilities, columns in self.diseases order
+        leaves = apply_trees(self, X)
+        return np.clip(self.value[leaves].mean(axis=1), 0.0, 1.0)
+
+
+def stored_inputs(path=FAST_MODEL_FILE):
+    with np.load(path) as data:
+        return data["inputs"].astype(np.float64)
+
+
+def fidelity(predicted, reference, threshold=0.2):
+    # Fast vs forest probabilities -> error in percentage points and how often
+    # the ⚠️/✅ label (risk >= 20%) agrees, per disease
+    error = np.abs(predicted - reference) * 100
+    return {
+        "mae_pp": error.mean(axis=0),
+        "p99_pp": np.percentile(error, 99, axis=0),
+        "max_pp": error.max(axis=0),
+        "label_agreement": ((predicted >= threshold) == (reference >= threshold)).mean(axis=0),
+    }
+
+
+def _single_row_ms(predict, X, repeats=200):
+    started = time.perf_counter()
+    for i in range(repeats):
+        predict(X[i % len(X)][None, :])
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def forest_probabilities(models, inputs, features):
+    # (n_rows, n_diseases) P(class 1) from the fitted forests; scikit-learn's
+    # own predict_proba is much faster than the bundle on large batches
+    import pandas as pd
+
+    X = pd.DataFrame(inputs, columns=features)
+    return np.column_stack([model.predict_proba(X)[:, list(model.classes_).index(1)]
+                            for model in models.values()])
+
+
+def distill(models, inputs, features, path=FAST_MODEL_FILE, n_trees=FAST_TREES,
+            max_depth=FAST_MAX_DEPTH, holdout=0.2, seed=42):
+    # Fits the ensemble to the forests' probabilities over `inputs` and checks
+    # it on held-out inputs. Within the FAST_* bounds it replaces `path`;
+    # otherwise `path` is removed, since it no longer matches the forests.
+    from sklearn.ensemble import RandomForestRegressor
+
+    targets = forest_probabilities(models, inputs, features)
+    order = np.random.default_rng(seed).permutation(len(inputs))
+    n_test = int(len(order) * holdout)
+    test, train = order[:n_test], order[n_test:]
+    model = RandomForestRegressor(n_estimators=n_trees, max_depth=max_depth, min_samples_leaf=3,
+                                  random_state=seed)
+    model.fit(inputs[train], targets[train])
+    tmp_path = write_fast_model(model, f"{path}.candidate.npz", features, list(models), inputs)
+
+    fast = FastModel(tmp_path)
+    report = fidelity(fast.predict(inputs[test]), targets[test])
+    report["fast_ms"] = _single_row_ms(fast.predict, inputs[test])
+    report["accepted"] = (report["mae_pp"].mean() <= FAST_MAX_MAE_PP
+                          and report["label_agreement"].mean() >= FAST_MIN_LABEL_AGREEMENT)
+    if report["accepted"]:
+        os.replace(tmp_path, path)
+    else:
+        os.remove(tmp_path)
+        if os.path.exists(path):
+            os.remove(path)
+    return report
+
+
+def print_fidelity_report(report, diseases):
+    print(f"\n⚡ Fast model vs forests (held-out inputs)")
+    print(f"{'disease':<22}{'MAE':>9}{'p99':>9}{'max':>9}{'label agree':>13}")
+    for i, disease in enumerate(diseases):
+        print(f"{disease:<22}{report['mae_pp'][i]:>7.2f}pp{report['p99_pp'][i]:>7.1f}pp"
+              f"{report['max_pp'][i]:>7.0f}pp{report['label_agreement'][i]:>12.1%}")
+    print(f"{'all':<22}{report['mae_pp'].mean():>7.2f}pp{report['p99_pp'].mean():>7.1f}pp"
+          f"{report['max_pp'].max():>7.0f}pp{report['label_agreement'].mean():>12.1%}")
+    print(f"Single-row latency: {report['fast_ms']:.3f} ms")
+    if report["accepted"]:
+        print(f"Saved distilled fast model to {FAST_MODEL_FILE}")
+    else:
+        print(f"⚠️ Outside the fidelity bounds (MAE <= {FAST_MAX_MAE_PP}pp, label agreement >= "
+              f"{FAST_MIN_LABEL_AGREEMENT:.0%}); no fast model, mode=\"fast\" uses the forests")
@@ -0,0 +1,143 @@
+import json
+import os
+import numpy as np
+
+# Single-file, memory-mappable layout for all disease forests:
+#   8-byte magic | uint32 header length | JSON header | 64-byte aligned node arrays
+# Node arrays hold every tree of every disease back to back with global child
+# indices, so many bot/dashboard workers can share the same mapped pages.
+BUNDLE_MAGIC = b"HMFB0001"
+BUNDLE_FILE = "healthmate_forests.bin"
+ALIGN = 64
+
+
+def _leaf_proba(tree, class_index):
+    value = tree.value[:, 0, :]
+    sums = value.sum(axis=1)
+    if np.allclose(sums[sums > 0], 1.0):
+        # Recent scikit-learn stores class fractions and returns them as-is
+        return np.ascontiguousarray(value[:, class_index], dtype=np.float64)
+    # Older releases store weighted counts and normalize in predict_proba
+    normalizer = sums.copy()
+    normalizer[normalizer == 0.0] = 1.0
+    return value[:, class_index] / normalizer
+
+
+def write_forest_bundle(models, path=BUNDLE_FILE, feature_names=None):
+    features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+    trees = {}
+    offset = 0
+    max_depth = 0
+    for disease, model in models.items():
+        class_index = list(model.classes_).index(1)
+        trees[disease] = [len(roots), len(model.estimators_)]
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            roots.append(offset)
+            features.append(tree.feature.astype(np.int32))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(is_leaf, -1, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, -1, tree.children_right + offset).astype(np.int32))
+            probas.append(_leaf_proba(tree, class_index))
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += tree.node_count
+
+    arrays = {
+        "tree_roots": np.asarray(roots, dtype=np.int64),
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "proba": np.concatenate(probas),
+    }
+    if feature_names is None:
+        feature_names = [str(name) for name in next(iter(models.values())).feature_names_in_]
+
+    # Offsets depend on the header length, which depends on the offsets
+    layout = {}
+    header = b""
+    while True:
+        previous = header
+        position = len(BUNDLE_MAGIC) + 4 + len(header)
+        for name, array in arrays.items():
+            position = -(-position // ALIGN) * ALIGN
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+            position += array.nbytes
+        header = json.dumps({
+            "version": 1,
+            "features": feature_names,
+            "diseases": list(models),
+            "trees": trees,
+            "max_depth": max_depth,
+            "arrays": layout,
+        }).encode("utf-8")
+        if len(header) == len(previous):
+            break
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        for name, array in arrays.items():
+            f.write(b"\0" * (layout[name]["offset"] - f.tell()))
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def apply_trees(trees, X):
+    # Leaf index reached in every tree for every row -> (n_rows, n_trees).
+    # `trees` has the flattened node arrays (tree_roots, feature, threshold,
+    # left, right) and max_depth, as in the bundle.
+    X = np.asarray(X, dtype=np.float32)  # same input cast as scikit-learn trees
+    n_trees = len(trees.tree_roots)
+    nodes = np.tile(trees.tree_roots.astype(np.int32), X.shape[0])
+    # Only (row, tree) pairs still on an internal node are advanced each level
+    active = np.arange(nodes.size)
+    for _ in range(trees.max_depth):
+        current = nodes[active]
+        left = trees.left[current]
+        internal = left != -1
+        if not internal.all():
+            active, current, left = active[internal], current[internal], left[internal]
+            if active.size == 0:
+                break
+        go_left = X[active // n_trees, trees.feature[current]] <= trees.threshold[current]
+        nodes[active] = np.where(go_left, left, trees.right[current])
+    return nodes.reshape(X.shape[0], n_trees)
+
+
+class ForestBundle:
+    def __init__(self, path=BUNDLE_FILE):
+        with open(path, "rb") as f:
+            if f.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+                raise ValueError(f"{path} is not a HealthMate forest bundle")
+            header_len = int.from_bytes(f.read(4), "little")
+            header = json.loads(f.read(header_len))
+        self.path = path
+        self.features = header["features"]
+        self.diseases = header["diseases"]
+        self.trees = {disease: tuple(span) for disease, span in header["trees"].items()}
+        self.max_depth = header["max_depth"]
+        for name, spec in header["arrays"].items():
+            array = np.memmap(path, dtype=np.dtype(spec["dtype"]), mode="r",
+                              offset=spec["offset"], shape=tuple(spec["shape"]))
+            setattr(self, name, array)
+
+    def apply(self, X):
+        return apply_trees(self, X)
+
+    def predict_proba(self, X):
+        # {disease: P(class 1) per row}, bit-identical to RandomForest.predict_proba
+        leaf_proba = self.proba[self.apply(X)]
+        results = {}
+        for disease in self.diseases:
+            start, n_trees = self.trees[disease]
+            # Sequential (not pairwise) summation in tree order, like sklearn
+            total = np.cumsum(leaf_proba[:, start:start + n_trees], axis=1)[:, -1]
+            results[disease] = total / n_trees
+        return results
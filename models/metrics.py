@@ -0,0 +1,213 @@
+import functools
+import inspect
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Off unless HEALTHMATE_METRICS=1. Disabled, `timed` returns the function
+# unchanged and timer/inc/observe return immediately, so call sites can stay in.
+ENABLED = os.environ.get("HEALTHMATE_METRICS", "0") == "1"
+# Sampled cProfile capture: profile this share of timed calls and keep the ones
+# slower than PROFILE_SLOW_MS as .prof files (0 disables)
+PROFILE_SAMPLE_RATE = float(os.environ.get("HEALTHMATE_PROFILE_SAMPLE_RATE", 0))
+PROFILE_SLOW_MS = float(os.environ.get("HEALTHMATE_PROFILE_SLOW_MS", 250))
+PROFILE_DIR = os.environ.get("HEALTHMATE_PROFILE_DIR", "profiles")
+
+# Seconds; covers a cached lookup up to a cold model load
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_profiling = threading.Lock()  # one capture at a time; profilers don't nest
+
+
+def _key(name, labels):
+    # Label values are strings in the exposition format, so shard=0 and
+    # shard="0" are one series (and keys of mixed types still sort)
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+                break
+        histogram[-2] += seconds
+        histogram[-1] += 1
+
+
+@contextmanager
+def _timer(name, labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+@contextmanager
+def _null_timer():
+    yield
+
+
+def timer(name, **labels):
+    # with timer("storage_flush_seconds"): ...
+    return _timer(name, labels) if ENABLED else _null_timer()
+
+
+def _profile_start():
+    if PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        return None
+    if not _profiling.acquire(blocking=False):
+        return None
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another profiler is active in this thread
+        _profiling.release()
+        return None
+    return profiler
+
+
+def _profile_stop(profiler, name, seconds):
+    profiler.disable()
+    _profiling.release()
+    if seconds * 1000 < PROFILE_SLOW_MS:
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{name}-{int(time.time() * 1000)}.prof")
+    profiler.dump_stats(path)
+    inc("slow_profiles_total", function=name)
+
+
+def timed(name, **labels):
+    # Decorator for sync and async functions; records a histogram of call
+    # durations (failures included) under `name`
+    def decorate(func):
+        if not ENABLED:
+            return func
+        function = func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                profiler = _profile_start()
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    seconds = time.perf_counter() - started
+                    observe(name, seconds, **labels)
+                    if profiler is not None:
+                        _profile_stop(profiler, function, seconds)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _profile_start()
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - started
+                observe(name, seconds, **labels)
+                if profiler is not None:
+                    _profile_stop(profiler, function, seconds)
+        return wrapper
+    return decorate
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def render():
+    # Prometheus text exposition format
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, list(values)) for key, values in _histograms.items())
+    lines = []
+    typed = set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_labels(labels)} {value}")
+    for (name, labels), values in histograms:
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, count in zip(BUCKETS, values):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {values[-1]}")
+        lines.append(f"{name}_sum{_labels(labels)} {values[-2]}")
+        lines.append(f"{name}_count{_labels(labels)} {values[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def serve(port, host="127.0.0.1"):
+    # Local /metrics endpoint on a daemon thread; returns the server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    # Per-call overhead of a timed no-op, disabled vs enabled
+    def noop():
+        return None
+
+    calls = 200_000
+    for enabled in (False, True):
+        ENABLED = enabled
+        wrapped = timed("noop_seconds")(noop)
+        started = time.perf_counter()
+        for _ in range(calls):
+            wrapped()
+        overhead = (time.perf_counter() - started) / calls * 1e9
+        print(f"metrics {'enabled ' if enabled else 'disabled'}: {overhead:6.0f} ns per call")
+    print(render().splitlines()[-1])
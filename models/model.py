@@ -1,3 +1,12 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
@@ -5,9 +14,16 @@ from sklearn.metrics import accuracy_score, precision_score, recall_score
 from sklearn.preprocessing import LabelEncoder
 from imblearn.over_sampling import SMOTE
 import joblib
+from fast_model import (FAST_MODEL_FILE, distill, distillation_inputs, print_fidelity_report,
+                        stored_inputs)
+from forest_bundle import BUNDLE_FILE, write_forest_bundle
 
-# Load dataset
-df = pd.read_csv('healthmate_10_disease_dataset.csv')
+DATASET_FILE = 'healthmate_10_disease_dataset.csv'
+CACHE_DIR = 'train_cache'
+# Incremental training watermark (see --incremental)
+STATE_FILE = 'train_state.json'
+HOLDOUT_FILE = 'holdout.npz'
+HOLDOUT_MAX_ROWS = 20000
 
 # Features and targets
 features = [
@@ -23,36 +39,385 @@ targets = [
     'Risk_heart_disease', 'Risk_stress_burnout'
 ]
 
-# Encode categorical variables
-for col in ['Gender', 'Family_history']:
-    df[col] = LabelEncoder().fit_transform(df[col])
+# Anything that changes the resampled split must be part of the cache key
+SPLIT_PARAMS = {'test_size': 0.2, 'random_state': 42, 'smote_k_neighbors': 3}
 
-for target in targets:
-    X = df[features]
-    y = df[target]
+# LabelEncoder classes of the full dataset; appended rows are encoded the same
+# way even when a batch only contains one of the values
+CATEGORIES = {'Gender': ['Female', 'Male'], 'Family_history': ['No', 'Yes']}
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
 
-    minority_count = y_train.value_counts().min()
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def load_dataset(path):
+    df = pd.read_csv(path)
+    # Encode categorical variables
+    for col in ['Gender', 'Family_history']:
+        df[col] = LabelEncoder().fit_transform(df[col])
+    return df
+
+
+def share_matrices(df, data_hash, cache_dir):
+    # Written once as .npy so every worker maps the same pages read-only
+    x_path = os.path.join(cache_dir, f'{data_hash}_X.npy')
+    y_path = os.path.join(cache_dir, f'{data_hash}_y.npy')
+    if not (os.path.exists(x_path) and os.path.exists(y_path)):
+        np.save(x_path, np.ascontiguousarray(df[features].to_numpy(dtype=np.float64)))
+        np.save(y_path, np.ascontiguousarray(df[targets].to_numpy(dtype=np.int64)))
+    return x_path, y_path
+
+
+_shared = {}
+
+
+def _init_worker(x_path, y_path, dtypes):
+    _shared['X'] = np.load(x_path, mmap_mode='r')
+    _shared['y'] = np.load(y_path, mmap_mode='r')
+    # Per-column dtypes of the CSV, so SMOTE rounds synthetic integer columns
+    _shared['dtypes'] = dtypes
+
+
+def smote_resample(X_train, y_train):
+    minority_count = np.bincount(y_train).min()
     if minority_count < 6:
         # Skip SMOTE if too few minority samples
-        X_train_res, y_train_res = X_train, y_train
-    else:
-        smote = SMOTE(random_state=42, k_neighbors=3)
-        X_train_res, y_train_res = smote.fit_resample(X_train, y_train)
+        return X_train, y_train
+    smote = SMOTE(random_state=SPLIT_PARAMS['random_state'],
+                  k_neighbors=SPLIT_PARAMS['smote_k_neighbors'])
+    return smote.fit_resample(X_train, y_train)
+
+
+def resampled_split(target, data_hash, cache_dir, use_cache=True):
+    X = _shared['X']
+    y = _shared['y'][:, targets.index(target)]
+    params_key = hashlib.sha256(repr(sorted(SPLIT_PARAMS.items())).encode()).hexdigest()[:8]
+    cache_path = os.path.join(cache_dir, f'{data_hash}_{target}_{params_key}.npz')
+    if use_cache and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            return {name: cached[name] for name in cached.files}, True
 
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X_train_res, y_train_res)
+    train_idx, test_idx = train_test_split(
+        np.arange(len(y)), test_size=SPLIT_PARAMS['test_size'],
+        random_state=SPLIT_PARAMS['random_state'], stratify=y
+    )
+    X_train = pd.DataFrame(X[train_idx], columns=features).astype(_shared['dtypes'])
+    X_train_res, y_train_res = smote_resample(X_train, y[train_idx])
+
+    split = {'X_train': np.asarray(X_train_res, dtype=np.float64),
+             'y_train': np.asarray(y_train_res), 'test_idx': test_idx}
+    if use_cache:
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp_path, **split)
+        os.replace(tmp_path, cache_path)
+    return split, False
+
+
+def train_target(target, data_hash, cache_dir, tree_jobs=1, use_cache=True):
+    timings = {}
+    start = time.perf_counter()
+    split, cache_hit = resampled_split(target, data_hash, cache_dir, use_cache)
+    timings['split+smote'] = time.perf_counter() - start
 
+    start = time.perf_counter()
+    model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=tree_jobs)
+    X_train = pd.DataFrame(split['X_train'], columns=features).astype(_shared['dtypes'])
+    model.fit(X_train, split['y_train'])
+    timings['fit'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    test_idx = split['test_idx']
+    X_test = pd.DataFrame(_shared['X'][test_idx], columns=features).astype(_shared['dtypes'])
+    y_test = _shared['y'][test_idx, targets.index(target)]
     y_pred = model.predict(X_test)
+    metrics = {
+        'Accuracy': accuracy_score(y_test, y_pred),
+        'Precision': precision_score(y_test, y_pred, zero_division=0),
+        'Recall': recall_score(y_test, y_pred, zero_division=0),
+    }
+    timings['evaluate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model_path = f"{target}_rf_model.joblib"
+    joblib.dump(model, model_path)
+    timings['save'] = time.perf_counter() - start
+    return target, metrics, model_path, cache_hit, timings
+
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {'sources': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_FILE):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_new_rows(path, offset):
+    # Complete CSV lines appended after byte `offset` -> (frame, new offset).
+    # A trailing partial line is left for the next run.
+    with open(path, 'rb') as f:
+        header = f.readline()
+        if offset < len(header) or offset > os.fstat(f.fileno()).st_size:
+            offset = len(header)  # first run, or the file was replaced: start over
+        f.seek(offset)
+        chunk = f.read()
+    chunk = chunk[:chunk.rfind(b'\n') + 1]
+    if not chunk.strip():
+        return pd.DataFrame(columns=features + targets), offset + len(chunk)
+    return pd.read_csv(io.BytesIO(header + chunk)), offset + len(chunk)
+
+
+def encode_rows(df):
+    # Rows with every feature and label -> (X frame, y matrix); the rest are dropped
+    df = df.dropna(subset=features + targets).copy()
+    for col, classes in CATEGORIES.items():
+        df[col] = df[col].map({value: i for i, value in enumerate(classes)})
+    df = df.dropna(subset=list(CATEGORIES))
+    X = df[features].astype({col: 'int64' for col in CATEGORIES}).reset_index(drop=True)
+    return X, df[targets].to_numpy(dtype=np.int64)
 
-    print(f"\n📍 Disease: {target}")
-    print(f"Accuracy: {accuracy_score(y_test, y_pred):.2f}")
-    print(f"Precision: {precision_score(y_test, y_pred, zero_division=0):.2f}")
-    print(f"Recall: {recall_score(y_test, y_pred, zero_division=0):.2f}")
 
-    joblib.dump(model, f"{target}_rf_model.joblib")
-    print(f"Saved model to {target}_rf_model.joblib")
+def update_target(target, X_train, y_train, X_holdout, y_holdout, add_trees, max_trees, max_drop,
+                  increment=1):
+    # Grow the saved forest by `add_trees` trees fitted on the new rows only,
+    # keeping at most `max_trees` (oldest dropped first); the candidate is kept
+    # if its holdout accuracy is no more than `max_drop` below the current model.
+    # warm_start seeds new trees from random_state after skipping one draw per
+    # existing tree, so once old trees are dropped a fixed seed would repeat
+    # earlier trees' seeds; each increment gets its own random_state instead.
+    model = joblib.load(f"{target}_rf_model.joblib")
+    column = targets.index(target)
+    y = y_train[:, column]
+    if len(np.unique(y)) < 2:
+        return target, None, {'skipped': 'one class in new rows'}
+
+    y_test = y_holdout[:, column]
+    old_accuracy = accuracy_score(y_test, model.predict(X_holdout))
+    X_res, y_res = smote_resample(X_train, y)
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + add_trees,
+                     random_state=42 + increment)
+    model.fit(X_res, y_res)
+    if max_trees and len(model.estimators_) > max_trees:
+        del model.estimators_[:len(model.estimators_) - max_trees]
+        model.n_estimators = len(model.estimators_)
+
+    y_pred = model.predict(X_holdout)
+    metrics = {
+        'Accuracy': accuracy_score(y_test, y_pred),
+        'Previous accuracy': old_accuracy,
+        'Recall': recall_score(y_test, y_pred, zero_division=0),
+        'Trees': len(model.estimators_),
+    }
+    if metrics['Accuracy'] < old_accuracy - max_drop:
+        return target, None, metrics
+    return target, model, metrics
+
+
+def incremental_update(args):
+    # Folds labeled rows appended to args.incremental since the last run into
+    # the saved forests. Cost scales with the new rows: only they are read and
+    # fitted, and the holdout pool is capped.
+    stage_timings = {}
+    total_start = time.perf_counter()
+
+    start = time.perf_counter()
+    state = load_state(args.state)
+    source = os.path.abspath(args.incremental)
+    df, new_offset = read_new_rows(source, state['sources'].get(source, 0))
+    X_new, y_new = encode_rows(df)
+    stage_timings['read new rows'] = time.perf_counter() - start
+    if len(X_new) < args.min_rows:
+        print(f"⏳ {len(X_new)} new labeled rows in {args.incremental} "
+              f"(need {args.min_rows}); models unchanged")
+        return
+
+    # Part of every batch joins a persistent holdout pool the models never train on
+    order = np.random.default_rng(new_offset).permutation(len(X_new))
+    n_holdout = max(1, int(len(order) * args.holdout))
+    holdout_idx, train_idx = order[:n_holdout], order[n_holdout:]
+    X_train = X_new.iloc[train_idx].reset_index(drop=True)
+    y_train = y_new[train_idx]
+    holdout_path = os.path.join(args.cache_dir, HOLDOUT_FILE)
+    X_holdout, y_holdout = X_new.iloc[holdout_idx].to_numpy(np.float64), y_new[holdout_idx]
+    if os.path.exists(holdout_path):
+        with np.load(holdout_path) as pool:
+            X_holdout = np.vstack([pool['X'], X_holdout])[-HOLDOUT_MAX_ROWS:]
+            y_holdout = np.vstack([pool['y'], y_holdout])[-HOLDOUT_MAX_ROWS:]
+    X_holdout_df = pd.DataFrame(X_holdout, columns=features).astype(X_train.dtypes.to_dict())
+
+    start = time.perf_counter()
+    increment = state.get('increments', 0) + 1
+    results = {}
+    for target in targets:
+        _, model, metrics = update_target(target, X_train, y_train, X_holdout_df, y_holdout,
+                                          args.add_trees, args.max_trees, args.max_drop, increment)
+        results[target] = (model, metrics)
+    stage_timings[f'update {len(targets)} targets'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    trained_models = {}
+    for target in targets:
+        model, metrics = results[target]
+        model_path = f"{target}_rf_model.joblib"
+        print(f"\n📍 Disease: {target}")
+        for name, value in metrics.items():
+            print(f"{name}: {value:.2f}" if isinstance(value, float) else f"{name}: {value}")
+        if model is None:
+            print("Kept the current model")
+            trained_models[target] = joblib.load(model_path)
+            continue
+        joblib.dump(model, f"{model_path}.tmp")
+        os.replace(f"{model_path}.tmp", model_path)
+        print(f"Updated {model_path}")
+        trained_models[target] = model
+    updated = any(model is not None for model, _ in results.values())
+    if updated:
+        # Swapped in with one rename; running predict processes reload it
+        write_forest_bundle(trained_models, BUNDLE_FILE, features)
+        print(f"Saved compiled forests to {BUNDLE_FILE}")
+    stage_timings['save + swap artifacts'] = time.perf_counter() - start
+
+    if updated and os.path.exists(FAST_MODEL_FILE):
+        # Refit the fast model to the updated forests on its stored inputs
+        start = time.perf_counter()
+        report = distill(trained_models, stored_inputs(FAST_MODEL_FILE), features)
+        print_fidelity_report(report, targets)
+        stage_timings['distill fast model'] = time.perf_counter() - start
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    np.savez(f"{holdout_path}.tmp.npz", X=X_holdout, y=y_holdout)
+    os.replace(f"{holdout_path}.tmp.npz", holdout_path)
+    state['sources'][source] = new_offset
+    state['increments'] = increment
+    state['trees'] = {target: len(model.estimators_) for target, model in trained_models.items()}
+    save_state(state, args.state)
+    stage_timings['total'] = time.perf_counter() - total_start
+
+    print(f"\n⏱️ Incremental update: {len(X_train)} rows trained, {len(X_holdout)} holdout rows")
+    for stage, seconds in stage_timings.items():
+        print(f"{stage:<28}{seconds:>9.2f}s")
+
+
+def print_timing_report(stage_timings, target_timings, cache_hits):
+    print("\n⏱️ Timing report")
+    for stage, seconds in stage_timings.items():
+        print(f"{stage:<28}{seconds:>9.2f}s")
+    columns = ['split+smote', 'fit', 'evaluate', 'save']
+    print(f"\n{'target':<22}{'cache':>7}" + "".join(f"{c:>13}" for c in columns))
+    for target in targets:
+        timings = target_timings[target]
+        cache = 'hit' if cache_hits[target] else 'miss'
+        print(f"{target:<22}{cache:>7}" + "".join(f"{timings[c]:>12.2f}s" for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the HealthMate disease risk forests")
+    parser.add_argument('--data', default=DATASET_FILE)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help="worker processes, one target per task")
+    parser.add_argument('--tree-jobs', type=int, default=1,
+                        help="n_jobs for each forest's tree construction")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--no-cache', action='store_true',
+                        help="recompute SMOTE-resampled splits")
+    parser.add_argument('--incremental', metavar='CSV',
+                        help="update the saved forests with labeled rows appended to CSV "
+                             "since the last run, instead of retraining from scratch")
+    parser.add_argument('--add-trees', type=int, default=20,
+                        help="trees grown per forest on each incremental update")
+    parser.add_argument('--max-trees', type=int, default=200,
+                        help="forest size cap; the oldest trees are dropped first (0 = no cap)")
+    parser.add_argument('--min-rows', type=int, default=200,
+                        help="new labeled rows needed before an incremental update runs")
+    parser.add_argument('--holdout', type=float, default=0.2,
+                        help="share of each batch of new rows held out for validation")
+    parser.add_argument('--max-drop', type=float, default=0.02,
+                        help="largest holdout accuracy drop at which an update is still kept")
+    parser.add_argument('--state', default=STATE_FILE)
+    args = parser.parse_args()
+
+    if args.incremental:
+        incremental_update(args)
+        return
+
+    stage_timings = {}
+    total_start = time.perf_counter()
+
+    # Load dataset
+    start = time.perf_counter()
+    data_hash = file_hash(args.data)
+    df = load_dataset(args.data)
+    stage_timings['load+encode'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    os.makedirs(args.cache_dir, exist_ok=True)
+    x_path, y_path = share_matrices(df, data_hash, args.cache_dir)
+    dtypes = {col: str(df[col].dtype) for col in features}
+    del df
+    stage_timings['share feature matrix'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = {}
+    jobs = max(1, min(args.jobs, len(targets)))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(x_path, y_path, dtypes)) as pool:
+        futures = [
+            pool.submit(train_target, target, data_hash, args.cache_dir,
+                        args.tree_jobs, not args.no_cache)
+            for target in targets
+        ]
+        for future in as_completed(futures):
+            target, metrics, model_path, cache_hit, timings = future.result()
+            results[target] = (metrics, model_path, cache_hit, timings)
+    stage_timings[f'train {len(targets)} targets ({jobs} procs)'] = time.perf_counter() - start
+
+    trained_models = {}
+    for target in targets:
+        metrics, model_path, _, _ = results[target]
+        print(f"\n📍 Disease: {target}")
+        for name, value in metrics.items():
+            print(f"{name}: {value:.2f}")
+        print(f"Saved model to {model_path}")
+        trained_models[target] = joblib.load(model_path)
+
+    # Flatten all forests into one memory-mappable file for predict.py
+    start = time.perf_counter()
+    write_forest_bundle(trained_models, BUNDLE_FILE, features)
+    print(f"Saved compiled forests to {BUNDLE_FILE}")
+    stage_timings['export bundle'] = time.perf_counter() - start
+
+    # Small multi-output tree ensemble fitted to the forests' probabilities,
+    # for predict's mode="fast"
+    start = time.perf_counter()
+    report = distill(trained_models, distillation_inputs(np.load(x_path), features), features)
+    print_fidelity_report(report, targets)
+    stage_timings['distill fast model'] = time.perf_counter() - start
+
+    # Fresh forests hold none of the incremental rows: start their sources
+    # from the beginning again, with a new holdout pool
+    save_state({'sources': {}}, args.state)
+    holdout_path = os.path.join(args.cache_dir, HOLDOUT_FILE)
+    if os.path.exists(holdout_path):
+        os.remove(holdout_path)
+    stage_timings['total'] = time.perf_counter() - total_start
+
+    print_timing_report(
+        stage_timings,
+        {target: results[target][3] for target in targets},
+        {target: results[target][2] for target in targets},
+    )
+
 
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,258 @@
-import pandas as pd
-import joblib
+import numpy as np
+import os
+import threading
+import time
+import metrics
+from checkup import FEATURES, Checkup, calculate_bmi, feature_row
+from fast_model import FAST_MODEL_FILE, FastModel
+from forest_bundle import BUNDLE_FILE, ForestBundle
+from prediction_cache import PredictionCache
 
-# Load all models once
-models = {}
 diseases = [
     'Diagnosed_diabetes', 'Risk_anxiety', 'Risk_depression', 'Risk_obesity',
     'Risk_asthma', 'Risk_migraine', 'Risk_tb', 'Risk_cancer',
     'Risk_heart_disease', 'Risk_stress_burnout'
 ]
 
-for disease in diseases:
-    models[disease] = joblib.load(f"{disease}_rf_model.joblib")
-
-def calculate_bmi(weight_kg, height_cm):
-    height_m = height_cm / 100
-    bmi = weight_kg / (height_m ** 2)
-    return round(bmi, 2)
-
-def predict_health_risks(user_data):
-    # Prepare feature dict for the model
-    # Provide default values for any missing combined or dropped features
-    input_features = {
-        'Age': user_data.get('Age', 30),
-        'Gender': user_data.get('Gender', 0),  # 0=Male,1=Female
-        'BMI': user_data.get('BMI', calculate_bmi(user_data.get('Weight_kg', 70), user_data.get('Height_cm', 170))),
-        'Sleep_hours': user_data.get('Sleep_hours', 7),
-        'Physical_activity_mins': user_data.get('Exercise_freq', 0) * 30,  # assuming 30 mins per freq
-        'Water_intake_liters': user_data.get('Water_intake_liters', 2),
-        'Screen_time_hrs': 0,  # Removed, so default 0
-        'Stress_level': 0,     # Removed, so default 0
-        'Work_study_pressure': 0,  # Removed, so default 0
-        'Junk_food_per_week': user_data.get('Junk_food_per_week', 0),
-        'Fruit_veggies_per_day': user_data.get('Fruit_veggies_per_day', 3),
-        'Social_interaction_hrs': 0,  # Removed, default 0
-        'Family_history': user_data.get('Family_history', 0),
-    }
+# Seconds between checks for artifacts swapped in by model.py (-1 disables)
+RELOAD_INTERVAL = float(os.environ.get("HEALTHMATE_RELOAD_INTERVAL", 5))
+
+def load_artifacts():
+    # Prefer the memory-mapped bundle written by model.py; fall back to the pickles.
+    # The distilled fast model is optional (mode="fast" runs the forests without it).
+    fast = FastModel(FAST_MODEL_FILE) if os.path.exists(FAST_MODEL_FILE) else None
+    if os.path.exists(BUNDLE_FILE):
+        return ForestBundle(BUNDLE_FILE), {}, fast
+    import joblib  # only needed for the pickle fallback
+
+    return None, {disease: joblib.load(f"{disease}_rf_model.joblib") for disease in diseases}, fast
+
+def artifact_version():
+    # Changes whenever model.py rewrites the artifacts, so cached results expire
+    paths = [BUNDLE_FILE] if os.path.exists(BUNDLE_FILE) else [f"{d}_rf_model.joblib" for d in diseases]
+    if os.path.exists(FAST_MODEL_FILE):
+        paths.append(FAST_MODEL_FILE)
+    return ";".join(f"{os.stat(p).st_size}:{os.stat(p).st_mtime_ns}" for p in paths)
+
+# Load all models once; reload_if_changed() swaps in newer ones
+loaded_version = artifact_version()
+bundle, models, fast_model = load_artifacts()
+_last_reload_check = time.monotonic()
+_reload_lock = threading.Lock()
+
+# Memoize results for repeated answers (HEALTHMATE_PREDICT_CACHE_SIZE=0 disables)
+PREDICT_CACHE_SIZE = int(os.environ.get("HEALTHMATE_PREDICT_CACHE_SIZE", 65536))
+BMI_STEP = float(os.environ.get("HEALTHMATE_BMI_STEP", 0)) or None
+PREDICT_CACHE_DB = os.environ.get("HEALTHMATE_PREDICT_CACHE_DB")
+
+prediction_cache = None
+if PREDICT_CACHE_SIZE > 0:
+    prediction_cache = PredictionCache(
+        loaded_version, PREDICT_CACHE_SIZE, bmi_step=BMI_STEP, disk_path=PREDICT_CACHE_DB
+    )
 
-    # Create DataFrame with columns matching training data feature order
-    feature_order = [
-        'Age', 'Gender', 'BMI', 'Sleep_hours', 'Physical_activity_mins',
-        'Water_intake_liters', 'Screen_time_hrs', 'Stress_level',
-        'Work_study_pressure', 'Junk_food_per_week', 'Fruit_veggies_per_day',
-        'Social_interaction_hrs', 'Family_history'
-    ]
+def reload_if_changed():
+    # At most once per RELOAD_INTERVAL, stat the artifacts and load them again
+    # if model.py replaced them (full or --incremental training). The files are
+    # swapped with a rename, so scoring in flight keeps the old mapping.
+    global bundle, models, fast_model, loaded_version, _last_reload_check
+    if RELOAD_INTERVAL < 0 or time.monotonic() - _last_reload_check < RELOAD_INTERVAL:
+        return loaded_version
+    with _reload_lock:
+        if time.monotonic() - _last_reload_check < RELOAD_INTERVAL:
+            return loaded_version
+        _last_reload_check = time.monotonic()
+        try:
+            version = artifact_version()
+            if version == loaded_version:
+                return loaded_version
+            bundle, models, fast_model = load_artifacts()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Model reload failed, keeping the loaded models: {e}")
+            return loaded_version
+        loaded_version = version
+        if prediction_cache is not None:
+            prediction_cache.set_version(version)
+        metrics.inc("model_reloads_total")
+        print(f"🔄 Reloaded models ({version})")
+    return loaded_version
 
-    input_df = pd.DataFrame([input_features], columns=feature_order)
+# Column order the forests were trained on (see models/model.py)
+feature_order = FEATURES
 
+def build_feature_matrix(sessions):
+    # One contiguous float32 (n_sessions, n_features) block for the batch; a
+    # lone Checkup is scored straight from its own row
+    if len(sessions) == 1 and isinstance(sessions[0], Checkup):
+        return sessions[0].features[None, :]
+    X = np.empty((len(sessions), len(FEATURES)), dtype=np.float32)
+    for i, user_data in enumerate(sessions):
+        X[i] = feature_row(user_data)
+    return X
+
+def predict_proba_matrix(X):
+    # Run every model once over the whole batch -> {disease: risk % per row}
+    metrics.inc("predict_rows_total", len(X))
+    current_bundle, current_models = bundle, models  # one consistent set if a reload lands
+    if current_bundle is not None:
+        # The bundle walks all ten forests in one pass, so it is timed as one
+        with metrics.timer("predict_model_seconds", model="bundle"):
+            probas = current_bundle.predict_proba(X)
+        return {disease: probas[disease] * 100 for disease in diseases}
+    import pandas as pd
+
+    input_df = pd.DataFrame(X, columns=feature_order, copy=False)
     results = {}
-    for disease, model in models.items():
-        proba = model.predict_proba(input_df)[:, 1][0] * 100  # risk percentage
-        risk_label = "⚠️" if proba >= 20 else "✅"  # example threshold
-        results[disease] = (risk_label, proba)
+    for disease, model in current_models.items():
+        with metrics.timer("predict_model_seconds", model=disease):
+            results[disease] = model.predict_proba(input_df)[:, 1] * 100
+    return results
+
+def score_matrix(X):
+    # (n_rows, n_diseases) risk %, columns in `diseases` order
+    probas = predict_proba_matrix(X)
+    return np.column_stack([probas[disease] for disease in diseases])
+
+def fast_score_matrix(X, model):
+    # Like score_matrix, from the distilled model: a few hundred microseconds per
+    # user, within a few percentage points of the forests (see fast_model.py)
+    metrics.inc("predict_rows_total", len(X))
+    with metrics.timer("predict_model_seconds", model="fast"):
+        risks = model.predict(X) * 100
+    return risks[:, [model.diseases.index(disease) for disease in diseases]]
+
+def predict_health_risks_batch(sessions, mode="full"):
+    # mode="fast" scores with the distilled model when there is one; cached
+    # results are always from the forests, so fast results are not cached
+    if mode not in ("fast", "full"):
+        raise ValueError(f"mode must be 'fast' or 'full', not {mode!r}")
+    if len(sessions) == 0:
+        return []
+    reload_if_changed()
+    X = build_feature_matrix(sessions)
+    fast = fast_model
+    if mode == "fast" and fast is not None:
+        risks = fast_score_matrix(X, fast)
+    elif prediction_cache is not None:
+        risks = prediction_cache.get_or_compute(prediction_cache.quantize(X), score_matrix)
+    else:
+        risks = score_matrix(X)
 
+    results = []
+    for row_risks in risks:
+        row = {}
+        for disease, proba in zip(diseases, row_risks):
+            risk_label = "⚠️" if proba >= 20 else "✅"  # example threshold
+            row[disease] = (risk_label, proba)
+        results.append(row)
     return results
 
+def predict_health_risks(user_data, mode="full"):
+    return predict_health_risks_batch([user_data], mode)[0]
+
+
+# Lifestyle answers the dashboard's what-if sliders can change, with the grid
+# each one is swept over
+WHATIF_GRIDS = {
+    'Sleep_hours': np.arange(3, 12.5, 0.5),
+    'Physical_activity_mins': np.arange(0, 190, 10),
+    'Junk_food_per_week': np.arange(0, 15, 1),
+    'Water_intake_liters': np.arange(0, 6.5, 0.5),
+}
+
+def whatif_sweep(user_data, current=None, grids=WHATIF_GRIDS):
+    # One-at-a-time sweep: the user's row plus one copy per grid value of each
+    # adjustable feature, scored in a single batched call. `current` overrides
+    # feature values by feature_order name.
+    reload_if_changed()
+    base = feature_row(user_data).copy()
+    for feature, value in (current or {}).items():
+        base[feature_order.index(feature)] = value
+    blocks = [base[None, :]]
+    for feature, grid in grids.items():
+        block = np.repeat(base[None, :], len(grid), axis=0)
+        block[:, feature_order.index(feature)] = grid
+        blocks.append(block)
+    risks = score_matrix(np.vstack(blocks))
+
+    sweep = {"base_features": base, "base": risks[0], "grids": {}}
+    start = 1
+    for feature, grid in grids.items():
+        sweep["grids"][feature] = (np.asarray(grid, dtype=np.float64), risks[start:start + len(grid)])
+        start += len(grid)
+    return sweep
+
+def whatif_risks(sweep, adjustments):
+    # Combine the per-feature effects additively around the user's own risks;
+    # each value snaps to the nearest swept grid point
+    risks = sweep["base"].copy()
+    for feature, value in adjustments.items():
+        grid, grid_risks = sweep["grids"][feature]
+        risks += grid_risks[np.abs(grid - value).argmin()] - sweep["base"]
+    return dict(zip(diseases, np.clip(risks, 0, 100)))
+
+def replay_benchmark(csv_path, requests=5000, batch_size=1, seed=0):
+    # Replays user_data.csv-style traffic: each answer drawn from the values seen
+    # in the CSV, so coarse answers repeat the way they do across real users
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    columns = {
+        'Age': 'Age', 'Height': 'Height_cm', 'Weight': 'Weight_kg', 'Sleep_hours': 'Sleep_hours',
+        'Physical_activity_mins': 'Activity_minutes', 'Water_intake_liters': 'Water_intake_liters',
+        'Junk_food_per_week': 'Junk_food_per_week', 'Fruit_veggies_per_day': 'Fruit_veggies_per_day',
+        'Family_history': 'Family_history',
+    }
+    rng = np.random.default_rng(seed)
+    sessions = []
+    for _ in range(requests):
+        session = {key: df[col].iloc[rng.integers(len(df))].item() for key, col in columns.items()}
+        session['Gender'] = int(rng.integers(2))
+        session['BMI'] = calculate_bmi(session['Weight'], session['Height'])
+        sessions.append(session)
+
+    def run():
+        start = time.perf_counter()
+        for i in range(0, requests, batch_size):
+            predict_health_risks_batch(sessions[i:i + batch_size])
+        return (time.perf_counter() - start) / requests * 1000
+
+    global prediction_cache
+    cache = prediction_cache
+    prediction_cache = None
+    uncached_ms = run()
+    prediction_cache = cache or PredictionCache(loaded_version, 65536, bmi_step=BMI_STEP)
+    cached_ms = run()
+    print(f"uncached: {uncached_ms:.3f} ms/request")
+    print(f"cached:   {cached_ms:.3f} ms/request ({uncached_ms / cached_ms:.1f}x faster)")
+    print(f"cache stats: {prediction_cache.summary()}")
+
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score an example user or replay traffic")
+    parser.add_argument("--replay", metavar="CSV", help="user_data.csv-style file to replay")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+    if args.replay:
+        replay_benchmark(args.replay, args.requests, args.batch_size)
+        raise SystemExit
+
     # Test input example (you can modify this)
     test_input = {
         'Age': 54,
-        'Gender': 1,  # Female
-        'Height_cm': 165,
-        'Weight_kg': 90,
+        'Gender': 0,  # Female
+        'Height': 165,
+        'Weight': 90,
         'Sleep_hours': 6,
-        'Exercise_freq': 0,
+        'Physical_activity_mins': 0,
         'Water_intake_liters': 1,
         'Junk_food_per_week': 5,
         'Fruit_veggies_per_day': 1,
         'Family_history': 0,
     }
-    test_input['BMI'] = calculate_bmi(test_input['Weight_kg'], test_input['Height_cm'])
 
     predictions = predict_health_risks(test_input)
     for disease, (label, prob) in predictions.items():
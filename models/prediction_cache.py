@@ -0,0 +1,140 @@
+import atexit
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class PredictionCache:
+    # Bounded LRU of risk vectors keyed on (model artifact version, feature row),
+    # with an optional SQLite tier that several bot processes can share. New
+    # entries reach the disk in batches (write_batch rows or write_interval
+    # seconds), written outside the LRU lock.
+
+    def __init__(self, version, max_entries=65536, bmi_step=None, bmi_column=2,
+                 disk_path=None, write_batch=256, write_interval=1.0):
+        self.version = str(version).encode("utf-8") + b"|"
+        self.max_entries = max_entries
+        self.bmi_step = bmi_step
+        self.bmi_column = bmi_column
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "disk_hits": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.write_batch = write_batch
+        self.write_interval = write_interval
+        self._pending = []  # (key, value bytes) not yet on disk
+        self._last_write = time.monotonic()
+        self._db_lock = threading.Lock()
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions (key BLOB PRIMARY KEY, value BLOB NOT NULL)"
+            )
+            self._db.commit()
+            atexit.register(self.flush)
+
+    def set_version(self, version):
+        # New model artifacts: drop the in-memory entries. Disk rows are keyed
+        # on the version, so the old ones are simply never read again.
+        with self._lock:
+            self.version = str(version).encode("utf-8") + b"|"
+            self._entries.clear()
+
+    def quantize(self, X):
+        # Snap BMI to a grid so near-identical users share an entry; the model
+        # scores the snapped value, so hits and misses return the same numbers.
+        # X may be a session's own feature row, so it is snapped in a copy.
+        if self.bmi_step:
+            X = X.copy()
+            X[:, self.bmi_column] = np.round(X[:, self.bmi_column] / self.bmi_step) * self.bmi_step
+        return X
+
+    def summary(self):
+        stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = len(self._entries)
+        return stats
+
+    def _key(self, row):
+        return self.version + np.ascontiguousarray(row, dtype=np.float64).tobytes()
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_or_compute(self, X, compute):
+        # Rows of X -> (n_rows, n_outputs) from cache, computing only the misses
+        keys = [self._key(row) for row in X]
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = value
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+
+        if missing and self._db is not None:
+            rows = []
+            with self._db_lock:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows += self._db.execute(
+                        f"SELECT key, value FROM predictions WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+            with self._lock:
+                for key, value in rows:
+                    value = np.frombuffer(value, dtype=np.float64)
+                    found[key] = value
+                    self._store(key, value)
+                    self.stats["disk_hits"] += 1
+            missing = [key for key in missing if key not in found]
+
+        if missing:
+            positions = {}
+            for i, key in enumerate(keys):
+                positions.setdefault(key, i)
+            computed = compute(X[[positions[key] for key in missing]])
+            batch = None
+            with self._lock:
+                for key, value in zip(missing, computed):
+                    value = np.array(value, dtype=np.float64)
+                    found[key] = value
+                    self._store(key, value)
+                if self._db is not None:
+                    self._pending += [(key, found[key].tobytes()) for key in missing]
+                    if (len(self._pending) >= self.write_batch
+                            or time.monotonic() - self._last_write >= self.write_interval):
+                        batch, self._pending = self._pending, []
+                        self._last_write = time.monotonic()
+            if batch:
+                self._write(batch)
+
+        misses = set(missing)
+        with self._lock:
+            for key in keys:
+                self.stats["misses" if key in misses else "hits"] += 1
+        return np.stack([found[key] for key in keys])
+
+    def flush(self):
+        # Write the pending entries now (also run at exit)
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._last_write = time.monotonic()
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch):
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO predictions (key, value) VALUES (?, ?)", batch
+            )
+            self._db.commit()
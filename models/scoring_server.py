@@ -0,0 +1,253 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import metrics
+from checkup import clean_session
+
+logger = logging.getLogger(__name__)
+
+HOST = os.environ.get("HEALTHMATE_SCORING_HOST", "127.0.0.1")
+PORT = int(os.environ.get("HEALTHMATE_SCORING_PORT", 8500))
+MAX_BATCH_SIZE = int(os.environ.get("HEALTHMATE_SCORING_BATCH_SIZE", 64))
+# Extra linger once a worker is free; batches mostly form while workers are busy
+MAX_WAIT_MS = float(os.environ.get("HEALTHMATE_SCORING_WAIT_MS", 0))
+WORKERS = int(os.environ.get("HEALTHMATE_SCORING_WORKERS", 2))
+REQUEST_TIMEOUT = 30
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+
+def _load_models():
+    # Worker initializer: load every model once per process, before any request
+    from predict import predict_health_risks_batch
+    predict_health_risks_batch([{}])
+
+
+def score(sessions):
+    from predict import predict_health_risks_batch
+
+    return [{disease: [label, float(prob)] for disease, (label, prob) in result.items()}
+            for result in predict_health_risks_batch(sessions)]
+
+
+class Batcher:
+    # Server-side dynamic batching: while every worker is busy, requests from all
+    # connections queue up; as soon as one frees up, everything queued (up to
+    # max_batch_size sessions) is scored as one batch on the persistent pool.
+    # An idle server scores a lone request right away.
+
+    def __init__(self, score=score, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                 workers=WORKERS, use_processes=True):
+        self.score = score
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = pool(max_workers=workers, initializer=_load_models)
+        # Start every worker now so the models are loaded before traffic arrives
+        for warm in [self._executor.submit(time.sleep, 0.1) for _ in range(workers)]:
+            warm.result()
+        self._slots = threading.Semaphore(workers)
+        self._queue = queue.Queue()
+        self.stats = {"requests": 0, "sessions": 0, "batches": 0, "failed": 0, "max_batch_size": 0}
+        self._thread = threading.Thread(target=self._run, name="scoring-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, sessions):
+        future = Future()
+        self._queue.put((sessions, future))
+        return future
+
+    def summary(self):
+        stats = dict(self.stats)
+        stats["avg_batch_size"] = stats["sessions"] / stats["batches"] if stats["batches"] else 0.0
+        stats["queue_depth"] = self._queue.qsize()
+        return stats
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        self._slots.acquire()
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # finish this batch, stop on the next collect
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            sessions = [session for request, _ in batch for session in request]
+            self.stats["requests"] += len(batch)
+            self.stats["sessions"] += len(sessions)
+            self.stats["batches"] += 1
+            self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(sessions))
+            metrics.inc("scoring_batches_total")
+            metrics.inc("scoring_sessions_total", len(sessions))
+            self._dispatch(batch)
+
+    def _dispatch(self, batch, slot=True):
+        # `slot`: the batch holds one of the worker slots taken in _collect
+        sessions = [session for request, _ in batch for session in request]
+        try:
+            pending = self._executor.submit(self.score, sessions)
+        except Exception as exc:
+            self._deliver(batch, slot, None, exc)
+            return
+        pending.add_done_callback(lambda done: self._deliver(batch, slot, done))
+
+    def _deliver(self, batch, slot, done, error=None):
+        if slot:
+            self._slots.release()
+        if error is None:
+            error = done.exception()
+        if error is not None and len(batch) > 1:
+            # One bad request fails everything batched with it: score each on
+            # its own so only that request's caller gets the error
+            metrics.inc("scoring_batch_retries_total")
+            for item in batch:
+                self._dispatch([item], slot=False)
+            return
+        if error is not None:
+            self.stats["failed"] += len(batch)
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        results = done.result()
+        start = 0
+        for request, future in batch:
+            future.set_result(results[start:start + len(request)])
+            start += len(request)
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    # POST /predict with a session object -> {disease: [label, risk %]}, or with
+    # a list of sessions -> a list of those. GET /health -> batcher stats,
+    # GET /metrics -> Prometheus text.
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can pool connections
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    batcher = None
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path != "/health":
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, self.batcher.summary())
+
+    @metrics.timed("scoring_request_seconds")
+    def do_POST(self):
+        if self.path != "/predict":
+            self._reply(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._reply(413, {"error": "request too large"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._reply(400, {"error": "invalid JSON"})
+            return
+
+        single = isinstance(payload, dict)
+        sessions = [payload] if single else payload
+        if not isinstance(sessions, list) or not all(isinstance(s, dict) for s in sessions):
+            self._reply(400, {"error": "expected a session object or a list of them"})
+            return
+        if not sessions:
+            self._reply(200, [])
+            return
+        try:
+            sessions = [clean_session(session) for session in sessions]
+        except ValueError as exc:
+            self._reply(400, {"error": str(exc)})
+            return
+
+        try:
+            results = self.batcher.submit(sessions).result(timeout=REQUEST_TIMEOUT)
+        except Exception as exc:
+            logger.exception("Scoring failed")
+            self._reply(500, {"error": str(exc)})
+            return
+        self._reply(200, results[0] if single else results)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def serve(host=HOST, port=PORT, batcher=None):
+    ScoringHandler.batcher = batcher or Batcher()
+    server = ThreadingHTTPServer((host, port), ScoringHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HealthMate local scoring server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    batcher = Batcher(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+                      workers=args.workers)
+    server = serve(args.host, args.port, batcher)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # shut down like Ctrl-C
+    print(f"✅ Scoring server on http://{args.host}:{args.port}/predict "
+          f"({args.workers} workers ready in {time.perf_counter() - started:.1f}s)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        logger.info("Scoring stats: %s", batcher.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,521 @@
+import argparse
+import fcntl
+import json
+import mmap
+import os
+import re
+import threading
+import time
+import numpy as np
+import metrics
+
+# Append-only store of completed checkups: a small JSON header followed by
+# fixed-size little-endian records, so readers can memory-map the file and
+# pull whole columns without parsing.
+RECORD_MAGIC = b"HMREC001"
+RECORD_FILE = "user_health_data.rec"
+HEADER_SIZE = 1024
+
+DISEASES = [
+    'Diagnosed_diabetes', 'Risk_anxiety', 'Risk_depression', 'Risk_obesity',
+    'Risk_asthma', 'Risk_migraine', 'Risk_tb', 'Risk_cancer',
+    'Risk_heart_disease', 'Risk_stress_burnout'
+]
+LIFESTYLES = ['no', 'smoking', 'alcohol', 'both']
+UNKNOWN = 255  # code for missing/unrecognised categorical answers
+
+RECORD_DTYPE = np.dtype([
+    ('UserID', '<i8'),
+    ('Timestamp', '<f8'),
+    ('Name', 'S32'),
+    ('Gender', 'u1'),  # 1=Male, 0=Female, UNKNOWN
+    ('Family_history', 'u1'),
+    ('Lifestyle', 'u1'),  # index into LIFESTYLES
+    ('Revision', 'u1'),  # 0 as first saved, n for the nth re-save (see RecordWriter.update)
+    ('Age', '<f4'),
+    ('Height_cm', '<f4'),
+    ('Weight_kg', '<f4'),
+    ('BMI', '<f4'),
+    ('Sleep_hours', '<f4'),
+    ('Activity_minutes', '<f4'),
+    ('Water_intake_liters', '<f4'),
+    ('Junk_food_per_week', '<f4'),
+    ('Fruit_veggies_per_day', '<f4'),
+    ('Lifestyle_freq', '<f4'),
+    ('Probabilities', '<f4', (len(DISEASES),)),  # risk % per disease, NaN if missing
+])
+# Bytes of UserID + Timestamp at the start of a record, which identify it
+RECORD_KEY_BYTES = RECORD_DTYPE.fields['Timestamp'][1] + 8
+
+# User-ID index kept next to the store, log-structured: an unsorted tail of
+# recent appends (at most MAX_TAIL_ENTRIES) and sorted (UserID, Record) runs,
+# memory-mapped and binary-searched. A full tail is sorted into a run and merged
+# with the runs below the first free level, like a binary counter, so there are
+# O(log N) runs and each entry is merged O(log N) times.
+INDEX_DTYPE = np.dtype([('UserID', '<i8'), ('Record', '<i8')])
+INDEX_SUFFIX = ".idx"  # runs are <store>.idx.<level>, raw INDEX_DTYPE entries
+TAIL_SUFFIX = ".idx.tail"
+MAX_TAIL_ENTRIES = 4096
+
+# session key used by bot/main.py -> record field
+SESSION_FIELDS = {
+    'Age': 'Age',
+    'Height': 'Height_cm',
+    'Weight': 'Weight_kg',
+    'BMI': 'BMI',
+    'Sleep_hours': 'Sleep_hours',
+    'Physical_activity_mins': 'Activity_minutes',
+    'Water_intake_liters': 'Water_intake_liters',
+    'Junk_food_per_week': 'Junk_food_per_week',
+    'Fruit_veggies_per_day': 'Fruit_veggies_per_day',
+    'Lifestyle_freq': 'Lifestyle_freq',
+}
+
+
+def _header_bytes():
+    header = json.dumps({
+        "version": 1,
+        "dtype": [list(field) for field in RECORD_DTYPE.descr],
+        "diseases": DISEASES,
+    }).encode("utf-8")
+    header = RECORD_MAGIC + len(header).to_bytes(4, "little") + header
+    if len(header) > HEADER_SIZE:
+        raise ValueError("record header does not fit in HEADER_SIZE")
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _code(value, choices):
+    value = str(value).strip().lower()
+    return choices.index(value) if value in choices else UNKNOWN
+
+
+def make_record(user_id, session_data, timestamp=None):
+    record = np.zeros((), dtype=RECORD_DTYPE)
+    record['UserID'] = user_id
+    record['Timestamp'] = time.time() if timestamp is None else timestamp
+    record['Name'] = str(session_data.get('Name', '')).encode('utf-8')[:32]
+    record['Gender'] = {1: 1, 0: 0}.get(session_data.get('Gender'), UNKNOWN)
+    family = session_data.get('Family_history')
+    record['Family_history'] = UNKNOWN if family in (None, '') else int(family)
+    record['Lifestyle'] = _code(session_data.get('Lifestyle', ''), LIFESTYLES)
+    for key, field in SESSION_FIELDS.items():
+        record[field] = _number(session_data.get(key))
+
+    probabilities = np.full(len(DISEASES), np.nan, dtype=np.float32)
+    for i, disease in enumerate(DISEASES):
+        prediction = session_data.get('Predictions', {}).get(disease)
+        if isinstance(prediction, dict):
+            prediction = prediction.get('Probability')
+        probabilities[i] = _number(prediction)
+    record['Probabilities'] = probabilities
+    return record
+
+
+class RecordWriter:
+    # Buffers records in memory and appends them under an exclusive flock, so
+    # several bot workers can share one file without interleaving records.
+    # With autoflush, append() flushes once the buffer is full or stale; an
+    # event-loop caller turns it off and runs flush() on a worker thread instead,
+    # since the write and the periodic fsync block.
+
+    def __init__(self, path=RECORD_FILE, max_buffered=64, flush_interval=1.0,
+                 fsync_interval=5.0, autoflush=True):
+        self.path = path
+        self.tail_path = path + TAIL_SUFFIX
+        self.max_buffered = max_buffered
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.autoflush = autoflush
+        self._buffer = []
+        self._updates = []
+        self._lock = threading.Lock()  # one flush at a time; append() never waits on it
+        self._fd = None
+        self._index_checked = False
+        self._last_flush = time.monotonic()
+        self._last_fsync = time.monotonic()
+
+    def append(self, record):
+        record = np.asarray(record, dtype=RECORD_DTYPE)
+        self._buffer.append((int(record['UserID']), record.tobytes()))
+        if self.autoflush and (len(self._buffer) >= self.max_buffered
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def update(self, record):
+        # Re-saves the record with the same UserID and Timestamp (a checkup's
+        # refined results). Still in the buffer, it is replaced there; already
+        # in the file, it is appended as the next Revision, which supersedes
+        # the earlier ones (see latest_revisions). Appending moves the store on
+        # like any new record, so report keys and cohort refreshes pick it up.
+        record = np.asarray(record, dtype=RECORD_DTYPE)
+        self._updates.append(record.tobytes())
+
+    @metrics.timed("storage_flush_seconds")
+    def flush(self, fsync=False):
+        with self._lock:
+            # Take the buffer as it is; records appended meanwhile wait for the next flush
+            buffer, self._buffer = self._buffer, []
+            updates, self._updates = self._updates, []
+            try:
+                return self._flush(buffer, updates, fsync)
+            except BaseException:
+                self._buffer[:0] = buffer
+                self._updates[:0] = updates
+                raise
+
+    def _flush(self, buffer, updates, fsync):
+        self._last_flush = time.monotonic()
+        if updates:
+            buffered = {raw[:RECORD_KEY_BYTES]: i for i, (_, raw) in enumerate(buffer)}
+            rest = []
+            for raw in updates:
+                i = buffered.get(raw[:RECORD_KEY_BYTES])
+                if i is None:
+                    rest.append(raw)
+                else:
+                    buffer[i] = (buffer[i][0], raw)
+            updates = rest
+        if not buffer and not updates:
+            return 0
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            size = os.fstat(self._fd).st_size
+            if not self._index_checked:
+                size = self._truncate_partial(size)
+            if not self._index_checked and size > HEADER_SIZE:
+                # Records the index missed (a writer that died between writing
+                # records and their index entries) are indexed before anything
+                # new is appended
+                existing = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+                if _index_size(self.path) < existing:
+                    self._rebuild_index()
+            self._index_checked = True
+            if updates:
+                for raw in self._revise(updates):
+                    buffer.append((int.from_bytes(raw[:8], "little", signed=True), raw))
+            count = len(buffer)
+            if buffer:
+                self._write(buffer, size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        metrics.inc("storage_records_appended_total", count)
+        if fsync or time.monotonic() - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._fd)
+            self._last_fsync = time.monotonic()
+        return count
+
+    def _truncate_partial(self, size):
+        # A writer that died mid-append can leave part of a record (or of the
+        # header) at the end of the file; cut it off so what is appended next
+        # stays aligned. Callers hold the flock.
+        whole = 0
+        if size >= HEADER_SIZE:
+            whole = size - (size - HEADER_SIZE) % RECORD_DTYPE.itemsize
+        if whole != size:
+            os.ftruncate(self._fd, whole)
+            metrics.inc("storage_partial_bytes_truncated_total", size - whole)
+        return whole
+
+    def _write(self, buffer, size):
+        data = b"".join(raw for _, raw in buffer)
+        if size == 0:
+            data = _header_bytes() + data
+            size = HEADER_SIZE
+        view = memoryview(data)
+        while view:
+            written = os.write(self._fd, view)
+            view = view[written:]
+        # Index entries are written under the same lock, so they always
+        # cover a prefix of the record file
+        first = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        entries = np.empty(len(buffer), dtype=INDEX_DTYPE)
+        entries['UserID'] = [user_id for user_id, _ in buffer]
+        entries['Record'] = np.arange(first, first + len(buffer))
+        self._append_index(entries)
+
+    def _revise(self, updates):
+        # Numbers each update as the next revision of its record in the file
+        # (0 when there is none) -> records to append. Callers hold the flock.
+        records = read_records(self.path)
+        revised = []
+        for raw in updates:
+            record = np.frombuffer(raw, dtype=RECORD_DTYPE).copy()
+            numbers = find_user_records(int(record['UserID'][0]), self.path, records)
+            numbers = numbers[records['Timestamp'][numbers] == record['Timestamp'][0]]
+            if len(numbers):
+                record['Revision'] = min(int(records['Revision'][numbers].max()) + 1, 255)
+            revised.append(record.tobytes())
+        return revised
+
+    def _append_index(self, entries):
+        with open(self.tail_path, "ab") as f:
+            f.write(entries.tobytes())
+            tail_entries = f.tell() // INDEX_DTYPE.itemsize
+        if tail_entries >= MAX_TAIL_ENTRIES:
+            self._merge_tail()
+
+    def _merge_tail(self):
+        run = _sorted_run(np.fromfile(self.tail_path, dtype=INDEX_DTYPE))
+        runs = _index_runs(self.path)
+        level = 0
+        while level in runs:
+            run = _sorted_run(np.concatenate([_map_run(runs[level]), run]))
+            level += 1
+        # The new run is in place before the runs and tail it replaces go away,
+        # so a reader never misses an entry (it may see one twice)
+        _save_run(self.path, level, run)
+        for merged in range(level):
+            os.remove(runs[merged])
+        os.truncate(self.tail_path, 0)
+
+    def _rebuild_index(self):
+        # Every record in the store as one run; callers hold the store's flock
+        records = read_records(self.path)
+        run = np.empty(len(records), dtype=INDEX_DTYPE)
+        run['UserID'] = records['UserID']
+        run['Record'] = np.arange(len(records))
+        level = max(0, int(np.ceil(np.log2(max(1, len(run) / MAX_TAIL_ENTRIES)))))
+        stale = [p for p in _index_runs(self.path).values() if p != _run_path(self.path, level)]
+        _save_run(self.path, level, _sorted_run(run))
+        for old in stale:
+            os.remove(old)
+        if os.path.exists(self.tail_path):
+            os.truncate(self.tail_path, 0)
+        return len(run)
+
+    def close(self):
+        self.flush(fsync=True)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def read_records(path=RECORD_FILE):
+    # Memory-mapped structured array of every complete record in the file
+    if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    with open(path, "rb") as f:
+        if f.read(len(RECORD_MAGIC)) != RECORD_MAGIC:
+            raise ValueError(f"{path} is not a HealthMate record store")
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def store_generation(path=RECORD_FILE):
+    # Changes whenever records are appended; use it as a cache key
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return (0, 0)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _run_path(path, level):
+    return f"{path}{INDEX_SUFFIX}.{level}"
+
+
+def _index_runs(path):
+    # level -> run file
+    runs = {}
+    folder, prefix = os.path.split(path + INDEX_SUFFIX + ".")
+    with os.scandir(folder or ".") as entries:
+        for entry in entries:
+            level = entry.name[len(prefix):]
+            if entry.name.startswith(prefix) and level.isdigit():
+                runs[int(level)] = entry.path
+    return runs
+
+
+def _map_run(run_path):
+    # Runs are never rewritten in place (see _save_run), so a mapping stays valid
+    with open(run_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        return np.frombuffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), dtype=INDEX_DTYPE)
+
+
+def _sorted_run(entries):
+    # Stable sort; on concatenated sorted runs this is a linear merge
+    return entries[np.argsort(entries['UserID'], kind='stable')]
+
+
+def _save_run(path, level, run):
+    tmp_path = f"{_run_path(path, level)}.{os.getpid()}.tmp"
+    run.tofile(tmp_path)
+    os.replace(tmp_path, _run_path(path, level))
+
+
+def _index_entries(path):
+    # (tail, runs). The tail is read first: a merge writes its run before it
+    # truncates the tail. A run removed between listing and loading means a
+    # merge just finished, so the read starts over.
+    tail_path = path + TAIL_SUFFIX
+    while True:
+        tail = np.fromfile(tail_path, dtype=INDEX_DTYPE) if os.path.exists(tail_path) else \
+            np.zeros(0, dtype=INDEX_DTYPE)
+        try:
+            return tail, [_map_run(run_path) for run_path in _index_runs(path).values()]
+        except FileNotFoundError:
+            continue
+
+
+def _index_size(path):
+    tail, runs = _index_entries(path)
+    return len(tail) + sum(len(run) for run in runs)
+
+
+def find_user_records(user_id, path=RECORD_FILE, records=None):
+    # Record numbers for one user, oldest first, without scanning the store
+    if records is None:
+        records = read_records(path)
+    tail, runs = _index_entries(path)
+    if len(tail) + sum(len(run) for run in runs) < len(records):
+        # Records the index doesn't cover: a writer died between writing
+        # records and their index entries, or is between the two right now
+        # (the next RecordWriter flush indexes them; see also `storage.py reindex`)
+        return np.flatnonzero(records['UserID'] == user_id)
+
+    found = [tail['Record'][tail['UserID'] == user_id]]
+    for run in runs:
+        keys = run['UserID']
+        lo, hi = np.searchsorted(keys, user_id, 'left'), np.searchsorted(keys, user_id, 'right')
+        found.append(run['Record'][lo:hi])
+    return np.unique(np.concatenate(found))
+
+
+def latest_revisions(numbers, records):
+    # One user's record numbers without the revisions a later re-save of the
+    # same checkup superseded, in checkup (Timestamp) order
+    if not len(numbers):
+        return numbers
+    stamps = np.asarray(records['Timestamp'][numbers])
+    order = np.lexsort((numbers, stamps))
+    numbers, stamps = numbers[order], stamps[order]
+    return numbers[np.append(stamps[1:] != stamps[:-1], True)]
+
+
+def previous_revision(number, records, path=RECORD_FILE):
+    # Record number of the revision that record `number` superseded, or None
+    record = records[number]
+    if record['Revision'] == 0:
+        return None
+    numbers = find_user_records(int(record['UserID']), path, records)
+    numbers = numbers[(numbers < number) & (records['Timestamp'][numbers] == record['Timestamp'])]
+    return int(numbers[-1]) if len(numbers) else None
+
+
+def rebuild_index(path=RECORD_FILE):
+    writer = RecordWriter(path)
+    with open(path, "rb") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            return writer._rebuild_index()
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@metrics.timed("storage_lookup_seconds")
+def read_user_records(user_id, path=RECORD_FILE):
+    records = read_records(path)
+    numbers = find_user_records(user_id, path, records)
+    return np.asarray(records[latest_revisions(numbers[numbers < len(records)], records)])
+
+
+def records_to_frame(records, columns=None):
+    import pandas as pd
+
+    data = {}
+    for name in RECORD_DTYPE.names:
+        if name in ('Revision', 'Probabilities') or (columns and name not in columns):
+            continue
+        data[name] = np.asarray(records[name])
+    if 'Name' in data:
+        data['Name'] = [name.decode('utf-8', 'replace') for name in data['Name']]
+    if 'Gender' in data:
+        data['Gender'] = np.select([data['Gender'] == 1, data['Gender'] == 0], ['Male', 'Female'], '')
+    if 'Lifestyle' in data:
+        data['Lifestyle'] = [LIFESTYLES[code] if code < len(LIFESTYLES) else ''
+                             for code in data['Lifestyle']]
+    probabilities = np.asarray(records['Probabilities'])
+    for i, disease in enumerate(DISEASES):
+        if not columns or disease in columns:
+            data[disease] = probabilities[:, i]
+    return pd.DataFrame(data)
+
+
+_probability_re = re.compile(r"'Probability':\s*(?:np\.float\d*\()?\s*([-+0-9.eE]+|nan)")
+
+
+def _parse_probability(cell):
+    # "{'Label': '⚠️', 'Probability': np.float64(59.0)}" or a plain number
+    match = _probability_re.search(str(cell))
+    return _number(match.group(1) if match else cell)
+
+
+def migrate_csv(csv_path, store_path=RECORD_FILE):
+    import pandas as pd
+
+    gender_codes = {'male': 1, 'female': 0}
+    writer = RecordWriter(store_path, max_buffered=4096)
+    migrated = 0
+    for chunk in pd.read_csv(csv_path, chunksize=10000, dtype=str, keep_default_na=False):
+        for row in chunk.to_dict('records'):
+            session = {
+                'Name': row.get('Name', ''),
+                'Age': row.get('Age'),
+                'Height': row.get('Height_cm'),
+                'Weight': row.get('Weight_kg'),
+                'BMI': row.get('BMI'),
+                'Sleep_hours': row.get('Sleep_hours'),
+                'Physical_activity_mins': row.get('Activity_minutes'),
+                'Water_intake_liters': row.get('Water_intake_liters'),
+                'Junk_food_per_week': row.get('Junk_food_per_week'),
+                'Fruit_veggies_per_day': row.get('Fruit_veggies_per_day'),
+                'Lifestyle': row.get('Lifestyle', ''),
+                'Lifestyle_freq': row.get('Lifestyle_freq'),
+                'Predictions': {
+                    disease: _parse_probability(row[disease])
+                    for disease in DISEASES if disease in row
+                },
+            }
+            session['Gender'] = gender_codes.get(str(row.get('Gender', '')).lower())
+            family = str(row.get('Family_history', '')).strip()
+            session['Family_history'] = int(float(family)) if family else None
+            # CSV rows carry no timestamp; keep file order with a 0-based sequence
+            writer.append(make_record(int(row['UserID']), session, timestamp=migrated))
+            migrated += 1
+    writer.close()
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HealthMate record store tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser("migrate", help="convert a user_health_data.csv file")
+    migrate.add_argument("csv_path")
+    migrate.add_argument("--out", default=RECORD_FILE)
+    show = subparsers.add_parser("show", help="print the records in a store")
+    show.add_argument("path", nargs="?", default=RECORD_FILE)
+    reindex = subparsers.add_parser("reindex", help="rebuild the user-ID index")
+    reindex.add_argument("path", nargs="?", default=RECORD_FILE)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        count = migrate_csv(args.csv_path, args.out)
+        print(f"✅ Migrated {count} records from {args.csv_path} to {args.out}")
+    elif args.command == "reindex":
+        count = rebuild_index(args.path)
+        print(f"✅ Indexed {count} records in {args.path}")
+    else:
+        print(records_to_frame(read_records(args.path)).to_string())
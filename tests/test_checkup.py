@@ -0,0 +1,52 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "models"))
+from checkup import DEFAULT_ROW, Checkup, clean_session, feature_row, parse_answer
+
+# Chat replies in question order, as the bot receives them
+REPLIES = [('Age', '30'), ('Gender', 'Male'), ('Height', '175'), ('Weight', '80,5'),
+           ('Sleep_hours', '7.5'), ('Physical_activity_mins', '20'), ('Water_intake_liters', '1.5'),
+           ('Junk_food_per_week', '5'), ('Fruit_veggies_per_day', '2'), ('Family_history', 'yes'),
+           ('Lifestyle', 'Smoking'), ('Lifestyle_freq', '3')]
+
+
+def test_checkup_row_matches_the_dict_path():
+    checkup = Checkup('roy')
+    session = {'Name': 'roy'}
+    for key, text in REPLIES:
+        checkup.answer(key, text)
+        session[key] = parse_answer(key, text)
+        assert np.array_equal(feature_row(checkup), feature_row(session)), key
+    assert checkup.to_dict() == {**session, 'BMI': checkup['BMI']}
+    assert feature_row(checkup).dtype == np.float32
+
+
+def test_unanswered_features_keep_their_defaults():
+    checkup = Checkup()
+    assert np.array_equal(feature_row(checkup), DEFAULT_ROW)
+    assert np.array_equal(feature_row({}), DEFAULT_ROW)
+    assert 'Age' not in checkup and checkup.get('Age') is None
+
+
+@pytest.mark.parametrize("key, text", [
+    ('Age', 'thirty'), ('Age', '30.5'), ('Age', '0'), ('Age', '121'),
+    ('Height', '-175'), ('Weight', 'nan'), ('Sleep_hours', 'inf'), ('Sleep_hours', '25'),
+    ('Junk_food_per_week', '2.5'), ('Gender', 'other'), ('Family_history', 'maybe'),
+    ('Lifestyle', ''),
+])
+def test_parse_answer_rejects_bad_input(key, text):
+    with pytest.raises(ValueError):
+        parse_answer(key, text)
+
+
+def test_clean_session_names_the_bad_value():
+    assert clean_session({'Age': '30', 'Gender': 'male'}) == {'Age': 30, 'Gender': 1}
+    with pytest.raises(ValueError, match="Sleep_hours"):
+        clean_session({'Sleep_hours': 'lots'})
+    with pytest.raises(ValueError, match="Stress_level"):
+        clean_session({'Stress_level': float('inf')})
@@ -0,0 +1,91 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "models"))
+from cohorts import CohortAggregates, cohort_index
+from storage import DISEASES, UNKNOWN, RecordWriter, make_record, read_records
+
+
+def write_checkups(path, count, seed):
+    rng = np.random.default_rng(seed)
+    writer = RecordWriter(path)
+    for i in range(count):
+        session = {'Age': int(rng.integers(15, 80)), 'Gender': int(rng.integers(2)),
+                   'BMI': float(rng.uniform(16, 40)),
+                   'Predictions': {disease: float(rng.uniform(0, 100)) for disease in DISEASES}}
+        writer.append(make_record(i, session))
+    writer.close()
+
+
+def brute_force(path, age, gender, bmi):
+    records = read_records(path)
+    cohort = cohort_index(age, gender, bmi)
+    bands = cohort_index(records['Age'], records['Gender'], records['BMI'])
+    same = np.logical_and.reduce([band == i for band, i in zip(bands, cohort)])
+    return np.asarray(records['Probabilities'][same], dtype=np.float64)
+
+
+def test_incremental_refresh_matches_a_full_scan(tmp_path):
+    path = str(tmp_path / "records.rec")
+    aggregates = CohortAggregates(path)
+    total = 0
+    for seed in range(3):  # checkups arrive between page views
+        write_checkups(path, 400, seed)
+        total += aggregates.refresh(save_every=1)
+    assert total == aggregates.watermark == 1200
+
+    restarted = CohortAggregates(path)  # picks up the saved snapshot
+    assert restarted.watermark == 1200 and restarted.refresh() == 0
+    rebuilt = CohortAggregates(path, path=str(tmp_path / "rebuilt.npz"))
+    rebuilt.refresh()
+    for other in (restarted, rebuilt):
+        assert np.array_equal(other.counts, aggregates.counts)
+        assert np.allclose(other.sums, aggregates.sums)
+        assert np.array_equal(other.hist, aggregates.hist)
+
+    expected = brute_force(path, 40, 1, 27.0)
+    comparison = aggregates.compare(40, 1, 27.0, {DISEASES[0]: 50.0})
+    assert comparison["cohort"] == "Male, 35-44, overweight BMI"
+    assert comparison["count"] == len(expected)
+    means = [comparison["diseases"][disease]["mean"] for disease in DISEASES]
+    assert np.allclose(means, expected.mean(axis=0), rtol=1e-5)
+    assert comparison["diseases"][DISEASES[0]]["percentile"] == \
+        100 * (expected[:, 0] < 50).sum() / len(expected)  # 50 starts a 5-point bin
+
+
+def test_bands_are_right_open():
+    assert [int(i) for i in cohort_index(25, 0, 25.0)] == [2, 0, 2]  # 25-34, overweight
+    assert [int(i) for i in cohort_index(24.9, 1, 24.9)] == [1, 1, 1]  # 18-24, healthy
+    assert [int(i) for i in cohort_index(17, 0, 18.4)] == [0, 0, 0]
+
+
+def test_checkups_without_a_cohort_are_skipped(tmp_path):
+    path = str(tmp_path / "records.rec")
+    predictions = {disease: 10.0 for disease in DISEASES}
+    writer = RecordWriter(path)
+    writer.append(make_record(1, {'Age': 30, 'Gender': 1, 'BMI': 22.0, 'Predictions': predictions}))
+    writer.append(make_record(2, {'Age': 30, 'Gender': 'x', 'BMI': 22.0, 'Predictions': predictions}))
+    writer.append(make_record(3, {'Age': 30, 'Gender': 0, 'Predictions': predictions}))  # no BMI
+    writer.append(make_record(4, {'Age': 30, 'Gender': 0, 'BMI': 22.0}))  # not scored
+    writer.close()
+    assert read_records(path)['Gender'][1] == UNKNOWN
+    aggregates = CohortAggregates(path)
+    assert aggregates.refresh() == 4
+    assert aggregates.counts.sum() == 1
+
+
+def test_a_replaced_store_is_replayed(tmp_path):
+    path = str(tmp_path / "records.rec")
+    write_checkups(path, 300, seed=0)
+    aggregates = CohortAggregates(path)
+    aggregates.refresh()
+    os.remove(path)
+    write_checkups(path, 100, seed=1)
+    aggregates.refresh()
+    assert aggregates.watermark == 100 and aggregates.counts.sum() <= 100
+    fresh = CohortAggregates(path, path=str(tmp_path / "fresh.npz"))
+    fresh.refresh()
+    assert np.array_equal(fresh.counts, aggregates.counts)
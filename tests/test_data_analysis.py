@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "models"))
+from data_analysis import StreamingStats, analyze, write_synthetic_csv
+from storage import RecordWriter, make_record
+
+
+def test_chunked_stats_match_numpy():
+    values = np.random.default_rng(0).normal(25.5, 4.5, 100_000)
+    stats = StreamingStats(10, 60)
+    for chunk in np.array_split(values, 37):
+        stats.update(chunk)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert stats.variance == pytest.approx(values.var(ddof=1), rel=1e-9)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+    width = (stats.high - stats.low) / stats.bins
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        assert abs(stats.quantile(q) - np.quantile(values, q)) <= width
+
+
+def test_nan_and_out_of_range_values():
+    stats = StreamingStats(0, 10)
+    stats.update([np.nan, -5.0, 1.0, 2.0, 15.0])
+    assert stats.count == 4
+    assert stats.mean == pytest.approx(np.mean([-5.0, 1.0, 2.0, 15.0]))
+    assert (stats.underflow, stats.overflow, stats.counts.sum()) == (1, 1, 2)
+
+
+def test_analyze_streams_a_csv_in_chunks(tmp_path):
+    import pandas as pd
+
+    path = str(tmp_path / "synthetic.csv")
+    write_synthetic_csv(path, 5000, chunk_rows=700)
+    df = pd.read_csv(path)
+    stats = analyze(path, chunk_rows=300)
+    for column in ('Age', 'BMI'):
+        assert stats[column].count == len(df)
+        assert stats[column].mean == pytest.approx(df[column].mean())
+        assert stats[column].variance == pytest.approx(df[column].var())
+
+
+def test_analyze_counts_a_re_saved_checkup_once(tmp_path):
+    path = str(tmp_path / "records.rec")
+    writer = RecordWriter(path)
+    writer.append(make_record(1, {'Age': 30, 'BMI': 22.0}, timestamp=100.0))
+    writer.append(make_record(2, {'Age': 50, 'BMI': 30.0}, timestamp=100.0))
+    writer.flush()
+    writer.update(make_record(1, {'Age': 30, 'BMI': 22.0}, timestamp=100.0))
+    writer.close()
+    stats = analyze(path)
+    assert stats['Age'].count == 2
+    assert stats['Age'].mean == 40.0
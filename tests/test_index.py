@@ -0,0 +1,61 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "models"))
+import storage
+from storage import RecordWriter, find_user_records, make_record, read_records, rebuild_index
+
+CHECKUP = {'Name': 'ann', 'Age': 30}
+
+
+def write_checkups(path, user_ids, per_flush):
+    writer = RecordWriter(path, autoflush=False)
+    for i, user_id in enumerate(user_ids):
+        writer.append(make_record(user_id, CHECKUP, timestamp=float(i)))
+        if (i + 1) % per_flush == 0:
+            writer.flush()
+    writer.close()
+
+
+def index_files(path):
+    tail = os.path.getsize(path + storage.TAIL_SUFFIX) // storage.INDEX_DTYPE.itemsize
+    return tail, sorted(storage._index_runs(path))
+
+
+def test_full_tails_merge_like_a_binary_counter(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "MAX_TAIL_ENTRIES", 4)
+    path = str(tmp_path / "records.rec")
+    write_checkups(path, [i % 5 for i in range(12)], per_flush=4)
+    assert index_files(path) == (0, [0, 1])  # 3 full tails: runs of 4 and 8
+    write_checkups(path, [i % 5 for i in range(4)], per_flush=4)
+    assert index_files(path) == (0, [2])  # 4 full tails merged into one run of 16
+
+    tail, runs = storage._index_entries(path)
+    run = runs[0]
+    assert list(run['UserID']) == sorted(run['UserID'])
+    assert sorted(run['Record']) == list(range(16))
+
+
+def test_lookup_combines_the_tail_and_the_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "MAX_TAIL_ENTRIES", 4)
+    path = str(tmp_path / "records.rec")
+    user_ids = [i % 7 for i in range(27)]
+    write_checkups(path, user_ids, per_flush=2)
+    tail, runs = index_files(path)
+    assert tail and runs  # some entries in each
+    for user_id in range(8):
+        expected = np.flatnonzero(np.array(user_ids) == user_id)
+        assert list(find_user_records(user_id, path)) == list(expected)
+
+
+def test_unindexed_records_are_found_and_reindexed(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "MAX_TAIL_ENTRIES", 4)
+    path = str(tmp_path / "records.rec")
+    write_checkups(path, [1, 2, 1], per_flush=3)
+    os.remove(path + storage.TAIL_SUFFIX)  # as if the index entries were never written
+    assert list(find_user_records(1, path)) == [0, 2]  # full scan
+    assert rebuild_index(path) == len(read_records(path))
+    assert list(find_user_records(1, path)) == [0, 2]
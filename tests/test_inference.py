@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "models"), os.path.join(ROOT, "bot"), os.path.join(ROOT, "benchmarks")]
+from inference import InferenceScheduler
+
+USERS = 300
+
+
+def stub_batch(sessions):
+    # Stands in for the forests: a little work per batch, one result per session
+    time.sleep(0.002)
+    return [{"Risk_stub": ("✅", float(session.get("Age", 0)))} for session in sessions]
+
+
+def test_concurrent_checkups_resolve(tmp_path, monkeypatch):
+    # Hundreds of users finishing their checkup at once, fed through the
+    # running Application's update queue as polling or a webhook would, with
+    # Telegram stubbed out
+    monkeypatch.chdir(tmp_path)  # record store and session DB
+    import main as bot
+    from telegram_stub import CHECKUP_ANSWERS, StubRequest, make_update
+
+    monkeypatch.setattr(bot, "FAST_REPLY", False)
+    monkeypatch.setattr(bot, "WARM_UP_MODELS", False)
+
+    async def run():
+        request = StubRequest()
+        app = bot.build_application(request)
+        monkeypatch.setattr(bot.inference, "predict_batch", stub_batch)
+        await app.initialize()
+        await bot.on_startup(app)
+        await app.start()
+        try:
+            for text in CHECKUP_ANSWERS:  # everyone types their next answer at once
+                for user_id in range(1, USERS + 1):
+                    await app.update_queue.put(make_update(app.bot, user_id, text))
+            await asyncio.wait_for(app.update_queue.join(), 60)
+            stats = bot.inference.summary()
+        finally:
+            await app.stop()
+            await bot.on_shutdown(app)
+            await app.shutdown()
+        return request.sent, stats
+
+    sent, stats = asyncio.run(run())
+    assert stats["submitted"] == stats["completed"] == USERS
+    assert stats["failed"] == 0
+    assert stats["max_batch_size"] > 1 and stats["avg_batch_size"] > 1  # checkups were batched
+    summaries = [chat_id for chat_id, text in sent if text.startswith("📊")]
+    assert sorted(summaries) == list(range(1, USERS + 1))
+
+
+def test_stop_answers_pending_requests():
+    # stop() while one batch runs, one is held waiting for a worker and the
+    # rest are queued: every submitter still gets its result
+    def slow_batch(sessions):
+        time.sleep(0.05)
+        return stub_batch(sessions)
+
+    async def run():
+        scheduler = InferenceScheduler(slow_batch, max_batch_size=4, max_wait_ms=1, max_workers=1)
+        await scheduler.start()
+        pending = [asyncio.ensure_future(scheduler.submit({"Age": i})) for i in range(40)]
+        await asyncio.sleep(0.02)
+        await scheduler.stop()
+        return await asyncio.wait_for(asyncio.gather(*pending), 5), scheduler.summary()
+
+    results, stats = asyncio.run(run())
+    assert [result["Risk_stub"][1] for result in results] == list(range(40))
+    assert stats["completed"] == 40
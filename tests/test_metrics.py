@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "models"))
+import metrics
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    monkeypatch.setattr(metrics, "_counters", {})
+    monkeypatch.setattr(metrics, "_histograms", {})
+
+
+def test_disabled_metrics_leave_functions_alone(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    monkeypatch.setattr(metrics, "_counters", {})
+
+    def handler():
+        return 1
+
+    assert metrics.timed("handler_seconds")(handler) is handler
+    metrics.inc("updates_total")
+    assert metrics.render() == "\n"
+
+
+def test_counters_and_histograms_render(enabled):
+    metrics.inc("updates_total", shard=0)
+    metrics.inc("updates_total", 2, shard=0)
+    metrics.inc("updates_total", shard='a"b')
+    metrics.observe("flush_seconds", 0.003)
+    metrics.observe("flush_seconds", 20.0)
+    lines = metrics.render().splitlines()
+    assert "# TYPE updates_total counter" in lines
+    assert 'updates_total{shard="0"} 3' in lines
+    assert 'updates_total{shard="a\\"b"} 1' in lines
+    assert 'flush_seconds_bucket{le="0.0025"} 0' in lines
+    assert 'flush_seconds_bucket{le="0.005"} 1' in lines
+    assert 'flush_seconds_bucket{le="10.0"} 1' in lines  # 20s is past the last bound
+    assert 'flush_seconds_bucket{le="+Inf"} 2' in lines
+    assert "flush_seconds_count 2" in lines
+    assert "flush_seconds_sum 20.003" in lines
+
+
+def test_timed_records_sync_async_and_failing_calls(enabled):
+    @metrics.timed("handler_seconds", state="ask_age")
+    async def handler():
+        return "ok"
+
+    @metrics.timed("load_seconds")
+    def load():
+        raise OSError("missing")
+
+    assert asyncio.run(handler()) == "ok"
+    with pytest.raises(OSError):
+        load()
+    lines = metrics.render().splitlines()
+    assert 'handler_seconds_count{state="ask_age"} 1' in lines
+    assert "load_seconds_count 1" in lines
+
+
+def test_slow_calls_are_profiled(enabled, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "PROFILE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(metrics, "PROFILE_SLOW_MS", 0)
+    monkeypatch.setattr(metrics, "PROFILE_DIR", str(tmp_path))
+
+    @metrics.timed("report_seconds")
+    def report():
+        return sum(range(1000))
+
+    report()
+    assert [name.endswith(".prof") for name in os.listdir(tmp_path)] == [True]
+    assert 'slow_profiles_total{function="test_slow_calls_are_profiled.<locals>.report"} 1' \
+        in metrics.render().splitlines()
+
+
+def test_metrics_endpoint(enabled):
+    metrics.inc("updates_total")
+    server = metrics.serve(0)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(url + "/metrics") as response:
+            assert "updates_total 1" in response.read().decode().splitlines()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/other")
+    finally:
+        server.shutdown()
+        server.server_close()
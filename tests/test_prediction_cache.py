@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "models"))
+from prediction_cache import PredictionCache
+
+
+class CountingModel:
+    # Stands in for score_matrix: risk = the row's sum, rows scored are recorded
+    def __init__(self):
+        self.scored = []
+
+    def __call__(self, X):
+        self.scored += [tuple(row) for row in X]
+        return X.sum(axis=1, keepdims=True)
+
+
+def rows(*bmis):
+    return np.array([[30.0, 1.0, bmi] for bmi in bmis])
+
+
+def test_new_version_invalidates_entries(tmp_path):
+    disk = str(tmp_path / "predictions.sqlite3")
+    model = CountingModel()
+    cache = PredictionCache("v1", disk_path=disk)
+    cache.get_or_compute(rows(22.0, 25.0), model)
+    cache.get_or_compute(rows(22.0, 25.0), model)
+    assert len(model.scored) == 2
+    cache.set_version("v2")
+    cache.get_or_compute(rows(22.0), model)
+    assert len(model.scored) == 3
+    cache.flush()
+
+    # Another process with the old version reads v1 rows from disk, a new
+    # version never does
+    other = PredictionCache("v1", disk_path=disk)
+    assert other.get_or_compute(rows(25.0), model)[0, 0] == 56.0
+    assert other.stats["disk_hits"] == 1 and len(model.scored) == 3
+    newer = PredictionCache("v3", disk_path=disk)
+    newer.get_or_compute(rows(25.0), model)
+    assert newer.stats["disk_hits"] == 0 and len(model.scored) == 4
+
+
+def test_bmi_is_quantized_to_the_step():
+    model = CountingModel()
+    cache = PredictionCache("v1", bmi_step=0.5)
+    X = rows(22.1, 22.2, 22.3)
+    risks = cache.get_or_compute(cache.quantize(X), model)
+    assert model.scored == [(30.0, 1.0, 22.0), (30.0, 1.0, 22.5)]
+    assert list(risks[:, 0]) == [53.0, 53.0, 53.5]
+    assert list(X[:, 2]) == [22.1, 22.2, 22.3]  # the caller's row is not snapped
+    cache.get_or_compute(cache.quantize(rows(21.9)), model)  # a near-identical user
+    assert len(model.scored) == 2 and cache.summary()["hits"] == 1
+
+
+def test_disk_writes_are_batched(tmp_path):
+    disk = str(tmp_path / "predictions.sqlite3")
+    cache = PredictionCache("v1", disk_path=disk, write_batch=3, write_interval=3600)
+
+    def on_disk():
+        with sqlite3.connect(disk) as db:
+            return db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    model = CountingModel()
+    cache.get_or_compute(rows(20.0, 21.0), model)
+    assert on_disk() == 0
+    cache.get_or_compute(rows(22.0), model)
+    assert on_disk() == 3
+    cache.get_or_compute(rows(23.0), model)
+    cache.flush()
+    assert on_disk() == 4
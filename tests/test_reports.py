@@ -0,0 +1,83 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "models"))
+sys.path.insert(0, os.path.join(ROOT, "dashboard"))
+import reports
+from reports import ReportCache, _report_inputs, cached_report, prerender, report_for_user
+from storage import DISEASES, RecordWriter, make_record, read_records
+from utils import generate_wellness_plan
+
+FAST = {'Name': 'ann', 'Age': 30, 'Predictions': {disease: 10.0 for disease in DISEASES}}
+REFINED = {**FAST, 'Predictions': {**FAST['Predictions'], 'Risk_obesity': 25.0}}
+
+
+def test_revised_record_renders_a_new_report(tmp_path):
+    path = str(tmp_path / "records.rec")
+    cache = ReportCache(str(tmp_path / "reports"))
+    writer = RecordWriter(path)
+    writer.append(make_record(1, FAST, timestamp=100.0))
+    writer.flush()
+    report_for_user(1, path, cache)
+    writer.update(make_record(1, REFINED, timestamp=100.0))
+    writer.flush()
+    report_for_user(1, path, cache)
+    writer.close()
+    assert len(os.listdir(cache.directory)) == 2  # the fast report is not served again
+
+
+def test_least_recently_used_reports_are_evicted(tmp_path):
+    cache = ReportCache(str(tmp_path / "reports"), max_bytes=250)
+    for key, stamp in (("a", 1), ("b", 2)):
+        os.utime(cache.put(key, b"x" * 100), (stamp, stamp))
+    assert cache.get("a") is not None  # now the most recently used
+    cache.put("c", b"x" * 100)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_report_evicted_during_a_read_is_a_miss(tmp_path, monkeypatch):
+    cache = ReportCache(str(tmp_path / "reports"))
+    cache.put("a", b"pdf")
+
+    def evicted(path, times=None):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(reports.os, "utime", evicted)
+    assert cache.get("a") is None
+
+
+def test_reports_are_shared_across_processes(tmp_path):
+    path = str(tmp_path / "records.rec")
+    writer = RecordWriter(path)
+    for user_id in range(1, 5):
+        writer.append(make_record(user_id, FAST, timestamp=100.0))
+    writer.close()
+    cache = ReportCache(str(tmp_path / "reports"))
+    assert prerender(range(1, 5), path, cache, workers=2) == 4  # rendered in the pool
+    assert prerender(range(1, 5), path, cache, workers=2) == 0
+    reports_found = [cached_report(user_id, path, cache) for user_id in range(1, 5)]
+    assert all(report is not None for report in reports_found)
+
+    # Another process's cache over the same directory evicts what the pool wrote
+    small = ReportCache(cache.directory, max_bytes=len(reports_found[0]))
+    small.evict()
+    assert len(os.listdir(cache.directory)) == 1
+
+
+def test_batch_report_plans_match_the_dashboard(tmp_path):
+    path = str(tmp_path / "records.rec")
+    writer = RecordWriter(path)
+    for user_id, risk in enumerate((10.0, 50.0, 50.004, 75.5)):
+        writer.append(make_record(user_id, {'Name': f"user{user_id}" if user_id else "",
+                                            'Predictions': {disease: risk for disease in DISEASES}}))
+    writer.close()
+    records = read_records(path)
+    inputs = _report_inputs(records)
+    assert [name for name, _, _ in inputs] == ["Friend", "user1", "user2", "user3"]
+    for (_, risks, plan), record in zip(inputs, records):
+        shown = {disease: round(float(risk), 2) for disease, risk in zip(DISEASES, record['Probabilities'])}
+        assert risks == shown
+        assert plan == generate_wellness_plan(shown)
+    assert inputs[2][2] == inputs[1][2]  # 50.004 is shown as 50.0: not over the threshold
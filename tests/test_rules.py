@@ -0,0 +1,76 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "models"))
+from rules import (DEFAULT_PLAN, OPERATORS, REMINDER_RULES, TIP_RULES, health_tips, records_batch,
+                   reminder_mask, reminder_masks, reminders, wellness_plan, wellness_plans)
+from storage import DISEASES, RecordWriter, make_record, read_records
+
+
+def looped_mask(row, rules):
+    # The per-user branching the rule tables replaced
+    mask = 0
+    for bit, (column, op, threshold, _) in enumerate(rules):
+        value = row.get(column)
+        if value is not None and OPERATORS[op](value, threshold):
+            mask |= 1 << bit
+    return mask
+
+
+def test_masks_match_per_user_branching():
+    rng = np.random.default_rng(0)
+    rows = [{'Water_intake_liters': rng.uniform(0, 4), 'Physical_activity_mins': rng.uniform(0, 90),
+             'Junk_food_per_week': int(rng.integers(0, 10)), 'Sleep_hours': rng.uniform(3, 10)}
+            for _ in range(500)]
+    for row in rows[::7]:
+        del row['Sleep_hours']  # unanswered: never matches
+    expected = [looped_mask(row, REMINDER_RULES) for row in rows]
+    assert [reminder_mask(row) for row in rows] == expected
+    assert list(reminder_masks(rows)) == expected
+
+
+def test_one_row_a_list_and_columns_agree():
+    import pandas as pd
+
+    rows = [{'Water_intake_liters': 1, 'Physical_activity_mins': 45, 'Junk_food_per_week': 5,
+             'Sleep_hours': 5}, {'Water_intake_liters': 3, 'Physical_activity_mins': 10}]
+    frame = pd.DataFrame(rows)
+    columns = {column: frame[column].to_numpy() for column in frame}
+    expected = [reminder_mask(row) for row in rows]
+    assert list(reminders.masks(rows)) == expected
+    assert list(reminders.masks(columns)) == expected
+    assert list(reminders.masks(frame)) == expected
+    assert reminders.decode(expected[0]) == [REMINDER_RULES[i][3] for i in (0, 2, 3)]
+
+
+def test_tip_and_plan_thresholds():
+    risks = {'Diagnosed_diabetes': 20, 'Risk_anxiety': 19.99, 'Risk_heart_disease': 50,
+             'Risk_stress_burnout': 50.5}
+    assert health_tips(risks) == [TIP_RULES[0][3], TIP_RULES[8][3], TIP_RULES[9][3]]
+    assert wellness_plan(risks) == ["Practice meditation", "Take regular breaks"]
+    assert wellness_plan({'Diagnosed_diabetes': 10}) == DEFAULT_PLAN
+    assert health_tips({}) == []
+
+
+def test_batch_plans_are_independent_lists():
+    plans = wellness_plans({'Diagnosed_diabetes': np.array([10.0, 20.0])})
+    assert plans == [DEFAULT_PLAN, DEFAULT_PLAN]
+    plans[0].append("extra")
+    assert plans[1] == DEFAULT_PLAN and DEFAULT_PLAN[-1] != "extra"
+
+
+def test_records_batch_reads_the_store(tmp_path):
+    path = str(tmp_path / "records.rec")
+    writer = RecordWriter(path)
+    for user_id, risk in ((1, 60.0), (2, 10.0)):
+        session = {'Sleep_hours': 5, 'Water_intake_liters': 3,
+                   'Predictions': {disease: risk for disease in DISEASES}}
+        writer.append(make_record(user_id, session))
+    writer.close()
+    batch = records_batch(read_records(path), DISEASES)
+    assert list(reminder_masks(batch)) == [0b1000, 0b1000]  # low sleep; blanks never match
+    assert wellness_plans(batch)[1] == DEFAULT_PLAN
+    assert len(wellness_plans(batch)[0]) == 6
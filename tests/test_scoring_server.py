@@ -0,0 +1,65 @@
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "models"))
+import scoring_server
+from checkup import clean_session
+
+
+def stub_score(sessions):
+    # Fails the whole batch on any session it can't read, as the models do
+    time.sleep(0.05)
+    return [{"Risk_stub": ["✅", float(session.get("Age", 0))]} for session in sessions]
+
+
+@pytest.fixture
+def batcher(monkeypatch):
+    monkeypatch.setattr(scoring_server, "_load_models", lambda: None)
+    batcher = scoring_server.Batcher(stub_score, workers=1, use_processes=False)
+    yield batcher
+    batcher.close()
+
+
+def test_clean_session():
+    assert clean_session({"Age": "30", "Gender": "Male", "BMI": "24.5", "Name": "ann"}) == \
+        {"Age": 30, "Gender": 1, "BMI": 24.5, "Name": "ann"}
+    assert clean_session({"Gender": 0, "Family_history": None}) == {"Gender": 0, "Family_history": None}
+    for bad in ({"Age": "abc"}, {"Age": 500}, {"Gender": 2}, {"BMI": "nan"}):
+        with pytest.raises(ValueError):
+            clean_session(bad)
+
+
+def test_bad_request_fails_alone(batcher):
+    busy = batcher.submit([{"Age": 1}])  # takes the only worker, so the next two share a batch
+    time.sleep(0.01)
+    good = batcher.submit([{"Age": 30}, {"Age": 40}])
+    bad = batcher.submit([{"Age": "abc"}])
+    assert busy.result(5)[0]["Risk_stub"][1] == 1
+    assert [result["Risk_stub"][1] for result in good.result(5)] == [30, 40]
+    with pytest.raises(ValueError):
+        bad.result(5)
+    assert batcher.summary()["failed"] == 1
+
+
+def test_invalid_session_is_a_400(batcher):
+    server = scoring_server.serve("127.0.0.1", 0, batcher)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        for payload, status in (({"Age": "abc"}, 400), ([{"Age": 30}, {"Sleep_hours": 30}], 400),
+                                ({"Age": "30"}, 200)):
+            connection.request("POST", "/predict", json.dumps(payload))
+            response = connection.getresponse()
+            body = json.loads(response.read())
+            assert response.status == status, body
+        assert body == {"Risk_stub": ["✅", 30.0]}
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "models"), os.path.join(ROOT, "bot"), os.path.join(ROOT, "benchmarks")]
+
+EXPIRED = "⌛ Your checkup session expired. Type /start to begin again."
+
+
+def converse(monkeypatch, script, **settings):
+    # Runs (user_id, text) messages through the real ConversationHandler, with
+    # `script` entries that are callables run in between; returns what was sent
+    import main as bot
+    from telegram_stub import StubRequest, make_update
+
+    monkeypatch.setattr(bot, "WARM_UP_MODELS", False)
+    for name, value in settings.items():
+        monkeypatch.setattr(bot, name, value)
+
+    async def run():
+        request = StubRequest()
+        app = bot.build_application(request)
+        await app.initialize()
+        await bot.on_startup(app)
+        try:
+            for step in script:
+                if callable(step):
+                    step(bot)
+                else:
+                    user_id, text = step
+                    await app.process_update(make_update(app.bot, user_id, text))
+        finally:
+            await bot.on_shutdown(app)
+            await app.shutdown()
+        return request.sent
+
+    return asyncio.run(run())
+
+
+def test_expired_session_ends_the_checkup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sent = converse(monkeypatch, [
+        (1, "/start"), (1, "ann"), (1, "30"),
+        lambda bot: setattr(bot.user_sessions, "ttl_seconds", -1),
+        (1, "Female"),
+        (1, "165"),  # conversation already ended: no reply
+    ])
+    assert sent[-1] == (1, EXPIRED)
+    assert [text for _, text in sent].count(EXPIRED) == 1
+
+
+def test_evicted_session_ends_the_checkup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sent = converse(monkeypatch, [
+        (1, "/start"), (1, "ann"),
+        (2, "/start"), (2, "bob"),  # only one session fits: user 1's is evicted
+        (1, "30"),
+        (2, "40"),
+        (1, "/start"), (1, "ann"), (1, "30"),  # starting again works
+    ], MAX_ACTIVE_SESSIONS=1)
+    assert (1, EXPIRED) in sent
+    assert (2, EXPIRED) not in sent
+    assert sent[-1][0] == 1 and sent[-1][1] == "Got it! What’s your gender?"
+
+
+def test_finished_checkup_is_saved_with_its_reminder(tmp_path, monkeypatch):
+    from telegram_stub import CHECKUP_ANSWERS
+
+    monkeypatch.chdir(tmp_path)
+    saved = {}
+
+    def stub_models(bot):
+        bot.inference.predict_batch = lambda sessions: [{"Risk_stub": ("✅", 1.0)} for _ in sessions]
+
+    def check(bot):
+        saved["profile"] = bot.user_sessions.profile(1)
+        saved["reminders"] = [user_id for user_id, *_ in bot.user_sessions.reminders()]
+        saved["active"] = 1 in bot.user_sessions
+        saved["completed"] = bot.user_sessions.stats["completed"]
+
+    converse(monkeypatch, [stub_models] + [(1, text) for text in CHECKUP_ANSWERS] + [check],
+             FAST_REPLY=False)
+    assert saved["profile"]["Name"] == "roy"
+    assert saved["reminders"] == [1]
+    assert not saved["active"]
+    assert saved["completed"] == 1
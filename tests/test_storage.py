@@ -0,0 +1,77 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "models"))
+from storage import DISEASES, RecordWriter, make_record, read_records, read_user_records
+from cohorts import CohortAggregates
+
+FAST = {'Name': 'ann', 'Age': 30, 'Predictions': {'Risk_obesity': 10.0}}
+REFINED = {**FAST, 'Predictions': {'Risk_obesity': 25.0}}
+
+
+def obesity(records):
+    return [float(p) for p in records['Probabilities'][:, DISEASES.index('Risk_obesity')]]
+
+
+def test_update_replaces_the_buffered_record(tmp_path):
+    path = str(tmp_path / "records.rec")
+    writer = RecordWriter(path, autoflush=False)
+    writer.append(make_record(1, FAST, timestamp=100.0))
+    writer.append(make_record(2, FAST, timestamp=100.0))
+    writer.update(make_record(1, REFINED, timestamp=100.0))
+    writer.close()
+    assert list(read_records(path)['UserID']) == [1, 2]
+    assert obesity(read_records(path)) == [25.0, 10.0]
+
+
+def test_update_revises_a_flushed_record(tmp_path):
+    path = str(tmp_path / "records.rec")
+    writer = RecordWriter(path, autoflush=False)
+    for timestamp in (100.0, 200.0):
+        writer.append(make_record(1, FAST, timestamp=timestamp))
+    writer.append(make_record(2, FAST, timestamp=100.0))
+    writer.flush()
+    writer.update(make_record(1, REFINED, timestamp=100.0))
+    writer.update(make_record(3, REFINED, timestamp=100.0))  # nothing to replace: appended
+    writer.close()
+    records = read_records(path)
+    assert list(records['UserID']) == [1, 1, 2, 1, 3]
+    assert list(records['Revision']) == [0, 0, 0, 1, 0]
+    assert obesity(read_user_records(1, path)) == [25.0, 10.0]
+    assert obesity(read_user_records(3, path)) == [25.0]
+
+
+def test_cohorts_swap_in_the_revised_record(tmp_path):
+    path = str(tmp_path / "records.rec")
+    checkup = {'Age': 30, 'Gender': 1, 'BMI': 22.0}
+    fast = {**checkup, 'Predictions': {disease: 10.0 for disease in DISEASES}}
+    refined = {**checkup, 'Predictions': {**fast['Predictions'], 'Risk_obesity': 25.0}}
+    writer = RecordWriter(path)
+    writer.append(make_record(1, fast, timestamp=100.0))
+    writer.flush()
+    cohorts = CohortAggregates(path)
+    cohorts.refresh()
+    writer.update(make_record(1, refined, timestamp=100.0))
+    writer.close()
+    cohorts.refresh()
+    assert cohorts.counts.sum() == 1
+    assert cohorts.sums[..., DISEASES.index('Risk_obesity')].sum() == 25.0
+
+
+def test_partial_trailing_record_is_cut_off(tmp_path):
+    path = str(tmp_path / "records.rec")
+    writer = RecordWriter(path)
+    writer.append(make_record(1, FAST, timestamp=100.0))
+    writer.close()
+    with open(path, "ab") as f:  # a writer that died mid-append
+        f.write(make_record(2, FAST, timestamp=100.0).tobytes()[:50])
+    writer = RecordWriter(path)
+    writer.append(make_record(3, FAST, timestamp=200.0))
+    writer.close()
+    records = read_records(path)
+    assert list(records['UserID']) == [1, 3]
+    assert list(records['Timestamp']) == [100.0, 200.0]
+    assert obesity(read_user_records(3, path)) == [10.0]